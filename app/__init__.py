@@ -1,9 +1,19 @@
 from flask import Flask
+from flask.json.provider import DefaultJSONProvider
 
-from app import config
+from app import config, codec
+
+
+class JSONProvider(DefaultJSONProvider):
+    def dumps(self, obj, **kwargs) -> str:
+        return codec.dumps(obj, default=self.default)
+
+    def loads(self, s, **kwargs):
+        return codec.loads(s)
 
 
 app = Flask(__name__)
+app.json = JSONProvider(app)
 app.secret_key = config.APP_SECRET
 
 
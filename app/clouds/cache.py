@@ -0,0 +1,59 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+
+
+class StateCache:
+    def __init__(self, ttl: float, max_size: int = 1024):
+        self._ttl = ttl
+        self._ttls = {}
+        self._max_size = max_size
+        self._items = OrderedDict()
+        self._lock = Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def set_ttl(self, key, ttl: float):
+        self._ttls[key] = ttl
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None or item[1] < time.monotonic():
+                if item is not None:
+                    del self._items[key]
+                self.misses += 1
+                return default
+
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def peek(self, key, default=None):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None or item[1] < time.monotonic():
+                return default
+
+            return item[0]
+
+    def set(self, key, value):
+        with self._lock:
+            self._items[key] = (value, time.monotonic() + self._ttls.get(key, self._ttl))
+            self._items.move_to_end(key)
+            while len(self._items) > self._max_size:
+                self._items.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._items.pop(key, None)
+
+    def delete_matching(self, predicate):
+        with self._lock:
+            for key in [key for key in self._items if predicate(key)]:
+                del self._items[key]
+
+    @property
+    def stats(self) -> dict:
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._items)}
@@ -0,0 +1,52 @@
+import base64
+import hashlib
+import json
+import os
+import time
+from threading import Lock
+
+from cryptography.fernet import Fernet, InvalidToken
+
+
+class CredentialStore:
+    def __init__(self, path: str, secret: str):
+        self._path = path
+        self._fernet = Fernet(base64.urlsafe_b64encode(hashlib.sha256(secret.encode()).digest()))
+        self._lock = Lock()
+
+    def load(self, name: str) -> dict:
+        with self._lock:
+            entry = self._read().get(name)
+
+        if entry is None or entry['expires_at'] <= time.time():
+            return None
+
+        return entry['credentials']
+
+    def save(self, name: str, credentials: dict, expires_at: float):
+        with self._lock:
+            entries = self._read()
+            entries[name] = {'credentials': credentials, 'expires_at': expires_at}
+            self._write(entries)
+
+    def delete(self, name: str):
+        with self._lock:
+            entries = self._read()
+            if entries.pop(name, None) is not None:
+                self._write(entries)
+
+    def _read(self) -> dict:
+        try:
+            with open(self._path, 'rb') as file:
+                return json.loads(self._fernet.decrypt(file.read()))
+        except (OSError, ValueError, InvalidToken):
+            return {}
+
+    def _write(self, entries: dict):
+        try:
+            fd = os.open(self._path + '.tmp', os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with open(fd, 'wb') as file:
+                file.write(self._fernet.encrypt(json.dumps(entries).encode()))
+            os.replace(self._path + '.tmp', self._path)
+        except OSError:
+            pass
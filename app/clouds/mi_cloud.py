@@ -6,12 +6,55 @@ import hashlib
 import json
 import time
 import os
+from threading import Thread, RLock
 from arc4 import ARC4
 
+from app import codec
+
+from .cache import StateCache
+
+
+class Rc4Keystream:
+    DROP = bytes(1024)
+
+    def __init__(self, key: bytes):
+        self._rc4 = ARC4(key)
+        self._rc4.encrypt(self.DROP)
+        self._stream = b''
+
+    def apply(self, data: bytes) -> bytes:
+        size = len(data)
+        if size > len(self._stream):
+            self._stream += self._rc4.encrypt(bytes(size - len(self._stream)))
+
+        return (int.from_bytes(data, 'little') ^ int.from_bytes(self._stream[:size], 'little')).to_bytes(size, 'little')
+
+
+class MiCloudError(Exception):
+    pass
+
+
+class MiCloudAuthError(MiCloudError):
+    pass
+
 
 class MiCloud:
-    def __init__(self, username, password, region):
+    PROP_GET_CHUNK_SIZE = 50
+    CATALOG_FIELDS = ('token', 'did', 'model', 'name')
+    CATALOG_MISS_INTERVAL = 60
+    SESSION_TTL = 7 * 24 * 3600
+    LOGIN_BACKOFF = 1
+    LOGIN_BACKOFF_MAX = 300
+
+    def __init__(self, username, password, region, cache_ttl: float = 10, cache_size: int = 1024,
+                 catalog_path: str = None, login: bool = True, credentials=None):
         self._session = requests.session()
+        self._credentials = credentials
+        self.cache = StateCache(cache_ttl, cache_size)
+        self.catalog = {'token': {}, 'did': {}, 'model': {}}
+        self._catalog_path = catalog_path
+        self._catalog_refreshed = None
+        self._load_catalog()
 
         self._username = username
         self._password = password
@@ -20,6 +63,7 @@ class MiCloud:
         self._device_id = self._generate_device_id()
         self._sign = None
         self._ssecurity = None
+        self._ssecurity_bytes = None
         self._userId = None
         self._cUserId = None
         self._passToken = None
@@ -28,8 +72,14 @@ class MiCloud:
         self._serviceToken = None
 
         self.two_factor_auth_url = None
+        self.ready = False
+        self._login_lock = RLock()
+        self._generation = 0
+        self._login_delay = self.LOGIN_BACKOFF
+        self._login_retry_at = 0
 
-        self._login()
+        if login:
+            self.login()
 
     def _login_step_1(self):
         url = 'https://account.xiaomi.com/pass/serviceLogin?sid=xiaomiio&_json=true'
@@ -75,6 +125,7 @@ class MiCloud:
             successful = 'ssecurity' in json_resp and len(str(json_resp['ssecurity'])) > 4
             if successful:
                 self._ssecurity = json_resp['ssecurity']
+                self._ssecurity_bytes = base64.b64decode(self._ssecurity)
                 self._userId = json_resp['userId']
                 self._cUserId = json_resp['cUserId']
                 self._passToken = json_resp['passToken']
@@ -103,6 +154,75 @@ class MiCloud:
 
         return successful
 
+    def login(self) -> bool:
+        with self._login_lock:
+            if self._restore_session():
+                self.ready = True
+            else:
+                self.ready = bool(self._login())
+                if self.ready:
+                    self._store_session()
+            if self.ready:
+                self._generation += 1
+
+            return self.ready
+
+    def _relogin(self, generation: int) -> bool:
+        with self._login_lock:
+            if generation != self._generation:
+                return True
+
+            now = time.monotonic()
+            if now < self._login_retry_at:
+                return False
+
+            if self._credentials is not None:
+                self._credentials.delete(self._credentials_name())
+
+            if self._login():
+                self._store_session()
+                self._generation += 1
+                self._login_delay = self.LOGIN_BACKOFF
+                return True
+
+            self._login_retry_at = now + self._login_delay
+            self._login_delay = min(self._login_delay * 2, self.LOGIN_BACKOFF_MAX)
+            return False
+
+    def _credentials_name(self) -> str:
+        return f'mi_cloud:{self._username}:{self._region}'
+
+    def _restore_session(self) -> bool:
+        if self._credentials is None:
+            return False
+
+        session = self._credentials.load(self._credentials_name())
+        if session is None:
+            return False
+
+        self._ssecurity = session['ssecurity']
+        self._ssecurity_bytes = base64.b64decode(self._ssecurity)
+        self._userId = session['userId']
+        self._cUserId = session['cUserId']
+        self._serviceToken = session['serviceToken']
+        self._user_agent = session['user_agent']
+        self._device_id = session['device_id']
+
+        return True
+
+    def _store_session(self):
+        if self._credentials is None:
+            return
+
+        self._credentials.save(self._credentials_name(), {
+            'ssecurity': self._ssecurity,
+            'userId': self._userId,
+            'cUserId': self._cUserId,
+            'serviceToken': self._serviceToken,
+            'user_agent': self._user_agent,
+            'device_id': self._device_id
+        }, time.time() + self.SESSION_TTL)
+
     def _login(self) -> bool:
         self._session.close()
         self._session = requests.session()
@@ -115,7 +235,7 @@ class MiCloud:
 
         return self._login_step_1() and self._login_step_2() and self._login_step_3()
 
-    def _execute_api_call_encrypted(self, url, params):
+    def _prepare_request(self, url, params):
         headers = {
             'Accept-Encoding': 'identity',
             'User-Agent': self._user_agent,
@@ -135,36 +255,66 @@ class MiCloud:
         }
         millis = round(time.time() * 1000)
         nonce = self._generate_nonce(millis)
-        signed_nonce = self._signed_nonce(nonce)
-        fields = self._generate_enc_params(url, 'POST', signed_nonce, nonce, params, self._ssecurity)
+        signed_nonce = hashlib.sha256(self._ssecurity_bytes + nonce).digest()
+        keystream = Rc4Keystream(signed_nonce)
+        fields = self._generate_enc_params(url, 'POST', base64.b64encode(signed_nonce).decode(),
+                                           base64.b64encode(nonce).decode(), params, self._ssecurity, keystream)
+
+        return headers, cookies, fields, keystream
+
+    @staticmethod
+    def _parse_response(keystream: Rc4Keystream, response_text):
+        return codec.loads(keystream.apply(base64.b64decode(response_text)))
+
+    def _execute_api_call_encrypted(self, url, params):
+        headers, cookies, fields, keystream = self._prepare_request(url, params)
 
         try:
             response = self._session.post(url, headers=headers, cookies=cookies, params=fields, timeout=10)
         except:
             response = None
+        if response is not None and response.status_code in (401, 403):
+            raise MiCloudAuthError(response.status_code)
         if response is not None and response.status_code == 200:
-            decoded = self._decrypt_rc4(self._signed_nonce(fields['_nonce']), response.text)
-            return json.loads(decoded)
+            return self._parse_response(keystream, response.text)
 
         return None
 
-    def _signed_nonce(self, nonce):
-        hash_object = hashlib.sha256(base64.b64decode(self._ssecurity) + base64.b64decode(nonce))
+    def _execute_authorized(self, url, params):
+        generation = self._generation
+        try:
+            return self._execute_api_call_encrypted(url, dict(params))
+        except MiCloudAuthError:
+            if not self._relogin(generation):
+                raise
 
-        return base64.b64encode(hash_object.digest()).decode('utf-8')
+        return self._execute_api_call_encrypted(url, dict(params))
+
+    def _run(self, call):
+        try:
+            request = next(call)
+            while True:
+                request = call.send(self._execute_authorized(*request))
+        except StopIteration as exc:
+            return exc.value
 
     def _get_api_url(self):
         return 'https://' + ('' if self._region == 'cn' else (self._region + '.')) + 'api.io.mi.com/app'
 
     @staticmethod
-    def _to_json(response_text):
-        return json.loads(response_text.replace('&&&START&&&', ''))
+    def _get_result(response, url: str):
+        if response is None or 'result' not in response:
+            raise MiCloudError(f'No result from {url}: {response}')
+
+        return response['result']
 
     @staticmethod
-    def _generate_nonce(millis: int):
-        nonce_bytes = os.urandom(8) + (int(millis / 60000)).to_bytes(4, byteorder='big')
+    def _to_json(response_text):
+        return codec.loads(response_text.replace('&&&START&&&', ''))
 
-        return base64.b64encode(nonce_bytes).decode()
+    @staticmethod
+    def _generate_nonce(millis: int) -> bytes:
+        return os.urandom(8) + (int(millis / 60000)).to_bytes(4, byteorder='big')
 
     @staticmethod
     def _generate_agent() -> str:
@@ -197,10 +347,10 @@ class MiCloud:
         return base64.b64encode(hashlib.sha1(signature_string.encode('utf-8')).digest()).decode()
 
     @staticmethod
-    def _generate_enc_params(url, method, signed_nonce, nonce, params, ssecurity):
+    def _generate_enc_params(url, method, signed_nonce, nonce, params, ssecurity, keystream: Rc4Keystream):
         params['rc4_hash__'] = MiCloud._generate_enc_signature(url, method, signed_nonce, params)
         for k, v in params.items():
-            params[k] = MiCloud._encrypt_rc4(signed_nonce, v)
+            params[k] = base64.b64encode(keystream.apply(v.encode())).decode()
         params.update({
             'signature': MiCloud._generate_enc_signature(url, method, signed_nonce, params),
             'ssecurity': ssecurity,
@@ -209,65 +359,178 @@ class MiCloud:
 
         return params
 
-    @staticmethod
-    def _encrypt_rc4(password: str, payload: str) -> str:
-        r = ARC4(base64.b64decode(password))
-        r.encrypt(bytes(1024))
+    def get_devices(self):
+        return self._run(self._get_devices())
 
-        return base64.b64encode(r.encrypt(payload.encode())).decode()
+    def get_device_id(self, token: str):
+        return self._run(self._get_device_id(token))
 
-    @staticmethod
-    def _decrypt_rc4(password: str, payload: str) -> bytes:
-        r = ARC4(base64.b64decode(password))
-        r.encrypt(bytes(1024))
+    def refresh_catalog(self):
+        return self._run(self._refresh_catalog())
 
-        return r.encrypt(base64.b64decode(payload))
+    def start_catalog_refresh(self, interval: float):
+        def refresh():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.refresh_catalog()
+                except Exception:
+                    pass
 
-    def get_devices(self):
-        url = self._get_api_url() + '/home/device_list'
-        data = {'getVirtualModel': False, 'getHuamiDevices': 0}
-        params = {'data': json.dumps(data)}
+        Thread(target=refresh, name='MiCloudCatalog', daemon=True).start()
 
-        return self._execute_api_call_encrypted(url, params)['result']['list']
+    def set_ttl(self, did: str, siid: int, piid: int, ttl: float):
+        self.cache.set_ttl((did, siid, piid), ttl)
 
-    def get_device_id(self, token: str):
+    def get_properties(self, did: str, mapping: dict) -> dict:
+        return self._run(self._get_properties(did, mapping))
+
+    def get_properties_batch(self, requests: list, use_cache: bool = True) -> list:
+        return self._run(self._get_properties_batch(requests, use_cache))
+
+    def get_property(self, did: str, siid: int, piid: int):
+        return self._run(self._get_property(did, siid, piid))
+
+    def set_property(self, did: str, siid: int, piid: int, value):
+        return self._run(self._set_property(did, siid, piid, value))
+
+    def set_properties(self, did: str, values: list) -> list:
+        return self._run(self._set_properties(did, values))
+
+    def call_action(self, did: str, siid: int, aiid: int, in_: list = None, out: list = None):
+        return self._run(self._call_action(did, siid, aiid, in_, out))
+
+    def _get_devices(self):
         url = self._get_api_url() + '/home/device_list'
         data = {'getVirtualModel': False, 'getHuamiDevices': 0}
-        params = {'data': json.dumps(data)}
+        params = {'data': codec.dumps(data)}
 
-        devices = self._execute_api_call_encrypted(url, params)['result']['list']
+        return self._get_result((yield url, params), url)['list']
 
+    def _get_device_id(self, token: str):
+        device = self.catalog['token'].get(token)
+        if device is None and (self._catalog_refreshed is None or
+                               time.monotonic() - self._catalog_refreshed > self.CATALOG_MISS_INTERVAL):
+            yield from self._refresh_catalog()
+            device = self.catalog['token'].get(token)
+
+        return device['did'] if device else None
+
+    def _refresh_catalog(self):
+        devices = yield from self._get_devices()
+
+        self._catalog_refreshed = time.monotonic()
+        self._build_catalog(devices)
+        self._save_catalog(devices)
+
+        return devices
+
+    def _build_catalog(self, devices: list):
+        catalog = {'token': {}, 'did': {}, 'model': {}}
         for device in devices:
-            if device['token'] == token:
-                return device['did']
-        return None
+            catalog['token'][device.get('token')] = device
+            catalog['did'][device.get('did')] = device
+            catalog['model'].setdefault(device.get('model'), []).append(device)
 
-    def get_properties(self, did: str, mapping: dict):
-        url = self._get_api_url() + '/miotspec/prop/get'
-        data = {'datasource': 1, 'params': [{'did': did, **values} for values in mapping.values()]}
-        params = {
-            'data': json.dumps(data)
-        }
+        self.catalog = catalog
 
-        return self._execute_api_call_encrypted(url, params)
+    def _load_catalog(self):
+        if self._catalog_path is None or not os.path.exists(self._catalog_path):
+            return
 
-    def get_property(self, did: str, siid: int, piid: int):
-        url = self._get_api_url() + '/miotspec/prop/get'
-        data = {'datasource': 1, 'params': [{'did': did, 'siid': siid, 'piid': piid}]}
-        params = {'data': json.dumps(data)}
+        try:
+            with open(self._catalog_path) as file:
+                self._build_catalog(json.load(file))
+        except (OSError, ValueError):
+            pass
 
-        return self._execute_api_call_encrypted(url, params)['result'][0]['value']
+    def _save_catalog(self, devices: list):
+        if self._catalog_path is None:
+            return
 
-    def set_property(self, did: str, siid: int, piid: int, value):
+        # The device list also carries LAN details, only the index needed to resolve tokens is kept
+        index = [{key: device.get(key) for key in self.CATALOG_FIELDS} for device in devices]
+        try:
+            fd = os.open(self._catalog_path + '.tmp', os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with open(fd, 'w') as file:
+                json.dump(index, file)
+            os.replace(self._catalog_path + '.tmp', self._catalog_path)
+        except OSError:
+            pass
+
+    def _get_properties(self, did: str, mapping: dict):
+        return (yield from self._get_properties_batch([(did, mapping)]))[0]
+
+    def _get_properties_batch(self, requests: list, use_cache: bool = True):
+        url = self._get_api_url() + '/miotspec/prop/get'
+        requests = [(did, {name: values for name, values in mapping.items() if 'piid' in values})
+                    for did, mapping in requests]
+        keys = list(dict.fromkeys((did, values['siid'], values['piid'])
+                                  for did, mapping in requests for values in mapping.values()))
+
+        values = {}
+        if use_cache:
+            for key in keys:
+                value = self.cache.get(key)
+                if value is not None:
+                    values[key] = value
+            keys = [key for key in keys if key not in values]
+
+        for i in range(0, len(keys), self.PROP_GET_CHUNK_SIZE):
+            chunk = keys[i:i + self.PROP_GET_CHUNK_SIZE]
+            data = {'datasource': 1, 'params': [{'did': did, 'siid': siid, 'piid': piid} for did, siid, piid in chunk]}
+            params = {'data': codec.dumps(data)}
+
+            results = self._get_result((yield url, params), url)
+            for result in results:
+                if result.get('code', 0) == 0 and result.get('value') is not None:
+                    key = (str(result['did']), result['siid'], result['piid'])
+                    values[key] = result['value']
+                    self.cache.set(key, result['value'])
+
+        return [{name: values.get((did, key['siid'], key['piid'])) for name, key in mapping.items()}
+                for did, mapping in requests]
+
+    def _get_property(self, did: str, siid: int, piid: int):
+        return (yield from self._get_properties(did, {'value': {'siid': siid, 'piid': piid}}))['value']
+
+    def _set_property(self, did: str, siid: int, piid: int, value):
         url = self._get_api_url() + '/miotspec/prop/set'
         data = {'datasource': 1, 'params': [{'did': did, 'siid': siid, 'piid': piid, 'value': value}]}
-        params = {'data': json.dumps(data)}
+        params = {'data': codec.dumps(data)}
 
-        return self._execute_api_call_encrypted(url, params)
+        response = yield url, params
+        results = (response or {}).get('result') or []
+        if results and results[0].get('code', 0) == 0:
+            self.cache.set((did, siid, piid), value)
+        else:
+            self.cache.delete((did, siid, piid))
 
-    def call_action(self, did: str, siid: int, aiid: int, in_: list = None, out: list = None):
+        return response
+
+    def _set_properties(self, did: str, values: list):
+        url = self._get_api_url() + '/miotspec/prop/set'
+        data = {'datasource': 1, 'params': [{'did': did, **value} for value in values]}
+        params = {'data': codec.dumps(data)}
+
+        response = yield url, params
+        results = {(result['siid'], result['piid']): result.get('code', 0) == 0
+                   for result in (response or {}).get('result') or []}
+
+        for value in values:
+            key = (did, value['siid'], value['piid'])
+            if results.get((value['siid'], value['piid'])):
+                self.cache.set(key, value['value'])
+            else:
+                self.cache.delete(key)
+
+        return [results.get((value['siid'], value['piid']), False) for value in values]
+
+    def _call_action(self, did: str, siid: int, aiid: int, in_: list = None, out: list = None):
         url = self._get_api_url() + '/miotspec/action'
         data = {'params': {'did': did, 'siid': siid, 'aiid': aiid, 'in': in_ or [], 'out': out or []}}
-        params = {'data': json.dumps(data)}
+        params = {'data': codec.dumps(data)}
+
+        self.cache.delete_matching(lambda key: key[0] == did)
 
-        return self._execute_api_call_encrypted(url, params)
+        return (yield url, params)
@@ -0,0 +1,95 @@
+import asyncio
+from threading import Thread, Lock
+
+import aiohttp
+
+from .mi_cloud import MiCloud, MiCloudAuthError
+
+
+class AsyncMiCloud(MiCloud):
+    def __init__(self, username, password, region, cache_ttl: float = 10, cache_size: int = 1024,
+                 catalog_path: str = None, login: bool = True, connections: int = 100, credentials=None):
+        self._http = None
+        self._connections = connections
+
+        super().__init__(username, password, region, cache_ttl=cache_ttl, cache_size=cache_size,
+                         catalog_path=catalog_path, login=login, credentials=credentials)
+
+    def _get_http(self) -> aiohttp.ClientSession:
+        if self._http is None or self._http.closed:
+            self._http = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self._connections, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=10)
+            )
+
+        return self._http
+
+    async def _execute_api_call_encrypted(self, url, params):
+        headers, cookies, fields, keystream = self._prepare_request(url, params)
+        headers['Cookie'] = '; '.join(f'{k}={v}' for k, v in cookies.items())
+
+        try:
+            async with self._get_http().post(url, headers=headers, params=fields) as response:
+                status = response.status
+                response_text = await response.text()
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            return None
+        if status in (401, 403):
+            raise MiCloudAuthError(status)
+        if status == 200:
+            return self._parse_response(keystream, response_text)
+
+        return None
+
+    async def _execute_authorized(self, url, params):
+        generation = self._generation
+        try:
+            return await self._execute_api_call_encrypted(url, dict(params))
+        except MiCloudAuthError:
+            if not await asyncio.get_running_loop().run_in_executor(None, self._relogin, generation):
+                raise
+
+        return await self._execute_api_call_encrypted(url, dict(params))
+
+    async def _run(self, call):
+        try:
+            request = next(call)
+            while True:
+                request = call.send(await self._execute_authorized(*request))
+        except StopIteration as exc:
+            return exc.value
+
+    async def close(self):
+        if self._http is not None:
+            await self._http.close()
+
+
+class SyncMiCloud(AsyncMiCloud):
+    def __init__(self, username, password, region, cache_ttl: float = 10, cache_size: int = 1024,
+                 catalog_path: str = None, login: bool = True, connections: int = 100, credentials=None):
+        self._loop = None
+        self._loop_lock = Lock()
+
+        super().__init__(username, password, region, cache_ttl=cache_ttl, cache_size=cache_size,
+                         catalog_path=catalog_path, login=login, connections=connections, credentials=credentials)
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                Thread(target=self._loop.run_forever, name='MiCloud', daemon=True).start()
+
+            return self._loop
+
+    def _execute_api_call_encrypted(self, url, params):
+        call = AsyncMiCloud._execute_api_call_encrypted(self, url, params)
+
+        return asyncio.run_coroutine_threadsafe(call, self._get_loop()).result()
+
+    _execute_authorized = MiCloud._execute_authorized
+    _run = MiCloud._run
+
+    def close(self):
+        if self._loop is not None:
+            asyncio.run_coroutine_threadsafe(AsyncMiCloud.close(self), self._loop).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
@@ -1,12 +1,27 @@
 import requests
 import hashlib
 import time
+from threading import Thread, Lock
 from requests_aws4auth import AWS4Auth
 
+from app import codec
+
+from .cache import StateCache
+from .tcl_shadow import ShadowSubscriber, MqttTransport, presign_mqtt_path
+
 
 class TclCloud:
-    def __init__(self, username: str, password: str, region: str):
+    SESSION_TTL = 7 * 24 * 3600
+    REFRESH_MARGIN = 300
+    REFRESH_RETRY = 30
+
+    def __init__(self, username: str, password: str, region: str, cache_ttl: float = 10, cache_size: int = 64,
+                 login: bool = True, credentials=None):
         self.__session = requests.session()
+        self.__credentials = credentials
+        self.__refresh_lock = Lock()
+        self.cache = StateCache(cache_ttl, cache_size)
+        self._cache_ttl = cache_ttl
         self.__user_agent = 'aws-sdk-iOS/2.26.2 iOS/16.4.1 ru_RU'
 
         self._username = username
@@ -22,12 +37,114 @@ class TclCloud:
         self._access_key_id = None
         self._secret_key = None
         self._session_token = None
+        self._expiration = None
         self._signature = None
+        self.shadows = None
+        self.ready = False
+
+        if login:
+            self._login()
+
+    def login(self) -> bool:
+        try:
+            self._login()
+        except (requests.RequestException, KeyError, TypeError, ValueError):
+            self.ready = False
+
+        return self.ready
 
-        self._login_step_1()
-        self._login_step_2()
-        self._login_step_3()
-        self._login_step_4()
+    def _login(self):
+        if not self._restore_session():
+            self._login_step_1()
+            self._login_step_2()
+            self._login_step_3()
+            self._login_step_4()
+            self._store_session()
+        self.ready = True
+
+    def _refresh_credentials(self, signature: AWS4Auth = None):
+        with self.__refresh_lock:
+            if signature is not None and signature is not self._signature:
+                return
+
+            self._login_step_3()
+            self._login_step_4()
+            self._store_session()
+
+    def start_credentials_refresh(self):
+        def refresh():
+            while True:
+                if self._expiration is None:
+                    delay = self.REFRESH_RETRY
+                else:
+                    delay = max(self._expiration - self.REFRESH_MARGIN - time.time(), 0)
+                time.sleep(delay)
+
+                if not self.ready or not self._is_expiring():
+                    # An expired session that cannot be refreshed here must not turn this into a busy loop
+                    time.sleep(self.REFRESH_RETRY)
+                    continue
+
+                try:
+                    self._refresh_credentials(self._signature)
+                except (requests.RequestException, KeyError, TypeError, ValueError):
+                    time.sleep(self.REFRESH_RETRY)
+
+        Thread(target=refresh, name='TclCloudCredentials', daemon=True).start()
+
+    def _is_expiring(self) -> bool:
+        return self._expiration is not None and self._expiration - time.time() < self.REFRESH_MARGIN
+
+    def _credentials_name(self) -> str:
+        return f'tcl_cloud:{self._username}:{self._region}'
+
+    def _restore_session(self) -> bool:
+        if self.__credentials is None:
+            return False
+
+        session = self.__credentials.load(self._credentials_name())
+        if session is None:
+            return False
+
+        self._tcl_id = session['tcl_id']
+        self._access_token = session['access_token']
+        self._cloud_url = session['cloud_url']
+        self._cloud_region = session['cloud_region']
+        self._cognito_id = session['cognito_id']
+        self._cognito_token = session['cognito_token']
+        self._mqtt_endpoint = session['mqtt_endpoint']
+        self._access_key_id = session['access_key_id']
+        self._secret_key = session['secret_key']
+        self._session_token = session['session_token']
+        self._expiration = session['expiration']
+        self._signature = self._create_signature()
+
+        if self._expiration is None or self._expiration <= time.time():
+            try:
+                self._refresh_credentials()
+            except (requests.RequestException, KeyError, TypeError, ValueError):
+                self.__credentials.delete(self._credentials_name())
+                return False
+
+        return True
+
+    def _store_session(self):
+        if self.__credentials is None:
+            return
+
+        self.__credentials.save(self._credentials_name(), {
+            'tcl_id': self._tcl_id,
+            'access_token': self._access_token,
+            'cloud_url': self._cloud_url,
+            'cloud_region': self._cloud_region,
+            'cognito_id': self._cognito_id,
+            'cognito_token': self._cognito_token,
+            'mqtt_endpoint': self._mqtt_endpoint,
+            'access_key_id': self._access_key_id,
+            'secret_key': self._secret_key,
+            'session_token': self._session_token,
+            'expiration': self._expiration
+        }, time.time() + self.SESSION_TTL)
 
     def _login_step_1(self):
         url = 'https://rus.account.tcl.com/account/login'
@@ -104,6 +221,27 @@ class TclCloud:
         self._access_key_id = response_json['Credentials']['AccessKeyId']
         self._secret_key = response_json['Credentials']['SecretKey']
         self._session_token = response_json['Credentials']['SessionToken']
+        self._expiration = response_json['Credentials'].get('Expiration')
+        self._signature = self._create_signature()
+
+    def _create_signature(self) -> AWS4Auth:
+        return AWS4Auth(self._access_key_id, self._secret_key, self._cloud_region, 'iotdata',
+                        session_token=self._session_token)
+
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        if self._is_expiring():
+            self._refresh_credentials(self._signature)
+
+        for attempt in range(2):
+            signature = self._signature
+            response = self.__session.request(method, url, auth=signature, **kwargs)
+            if response.status_code != 403 or attempt:
+                return response
+
+            if codec.loads(response.content)['message'] is None:
+                raise ValueError('Invalid device id')
+
+            self._refresh_credentials(signature)
 
     @staticmethod
     def _generate_agent() -> str:
@@ -111,28 +249,41 @@ class TclCloud:
 
         return f'Android-7.1.1-1.0.0-ONEPLUS A3010-136-{agent_id}'
 
+    def subscribe(self, device_id: str, transport=None):
+        if self.shadows is None:
+            self.shadows = ShadowSubscriber(transport or MqttTransport(self._mqtt_endpoint,
+                                                                       path_factory=self._presign_mqtt_path),
+                                            max_age=self._cache_ttl)
+            self.shadows.start()
+
+        self.shadows.add(device_id)
+
+    def _presign_mqtt_path(self) -> str:
+        return presign_mqtt_path(self._mqtt_endpoint, self._cloud_region, self._access_key_id, self._secret_key,
+                                 self._session_token)
+
     def get_info(self, device_id: str):
+        if self.shadows is not None:
+            shadow = self.shadows.get(device_id)
+            if shadow is not None:
+                return shadow
+
+        shadow = self.cache.get(device_id)
+        if shadow is not None:
+            return shadow
+
         url = f'https://{self._mqtt_endpoint}/things/{device_id}/shadow'
         headers = {
             'User-Agent': self.__user_agent,
             'Content-Type': 'application/x-amz-json-1.0'
         }
-        response = self.__session.get(url, headers=headers, auth=AWS4Auth(
-            self._access_key_id,
-            self._secret_key,
-            self._cloud_region,
-            'iotdata',
-            session_token=self._session_token
-        ))
-
-        response_json = response.json()
-        if response.status_code == 403:
-            if response_json['message'] is None:
-                raise ValueError('Invalid device id')
+        response = self._request('GET', url, headers=headers)
 
-            self._login_step_3()
-            self._login_step_4()
-            return self.get_info(device_id)
+        response_json = codec.loads(response.content)
+        if response.status_code == 200:
+            self.cache.set(device_id, response_json)
+            if self.shadows is not None:
+                self.shadows.set(device_id, response_json)
 
         return response_json
 
@@ -151,21 +302,17 @@ class TclCloud:
             },
             'clientToken': 'mqtt_ios'
         }
-        response = self.__session.post(url, params=params, json=data, headers=headers, auth=AWS4Auth(
-            self._access_key_id,
-            self._secret_key,
-            self._cloud_region,
-            'iotdata',
-            session_token=self._session_token
-        ))
-
-        response_json = response.json()
-        if response.status_code == 403:
-            if response_json['message'] is None:
-                raise ValueError('Invalid device id')
+        response = self._request('POST', url, params=params, data=codec.dumps_bytes(data), headers=headers)
 
-            self._login_step_3()
-            self._login_step_4()
-            return self.send_action(device_id, **kwargs)
+        if response.status_code == 200 and self.shadows is not None:
+            self.shadows.patch_desired(device_id, kwargs)
 
-        return True
+        shadow = self.cache.peek(device_id)
+        if response.status_code == 200 and shadow is not None:
+            state = shadow.get('state', {})
+            self.cache.set(device_id, {**shadow, 'state': {**state, 'desired': {**state.get('desired', {}), **kwargs}},
+                                       'version': None})
+        else:
+            self.cache.delete(device_id)
+
+        return response.status_code == 200
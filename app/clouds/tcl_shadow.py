@@ -0,0 +1,223 @@
+import datetime
+import hashlib
+import hmac
+import os
+import ssl
+import time
+import urllib.parse
+from abc import ABC, abstractmethod
+from threading import Lock
+
+import paho.mqtt.client as mqtt
+
+from app import codec
+
+
+def presign_mqtt_path(host: str, region: str, access_key_id: str, secret_key: str, session_token: str = None) -> str:
+    now = datetime.datetime.now(datetime.timezone.utc)
+    amz_date = now.strftime('%Y%m%dT%H%M%SZ')
+    scope = f'{now.strftime("%Y%m%d")}/{region}/iotdevicegateway/aws4_request'
+    query = '&'.join(f'{k}={urllib.parse.quote(v, safe="")}' for k, v in sorted({
+        'X-Amz-Algorithm': 'AWS4-HMAC-SHA256',
+        'X-Amz-Credential': f'{access_key_id}/{scope}',
+        'X-Amz-Date': amz_date,
+        'X-Amz-SignedHeaders': 'host'
+    }.items()))
+    canonical_request = '\n'.join(['GET', '/mqtt', query, f'host:{host}\n', 'host', hashlib.sha256(b'').hexdigest()])
+    string_to_sign = '\n'.join(['AWS4-HMAC-SHA256', amz_date, scope,
+                                hashlib.sha256(canonical_request.encode()).hexdigest()])
+
+    key = f'AWS4{secret_key}'.encode()
+    for part in (now.strftime('%Y%m%d'), region, 'iotdevicegateway', 'aws4_request'):
+        key = hmac.new(key, part.encode(), hashlib.sha256).digest()
+    signature = hmac.new(key, string_to_sign.encode(), hashlib.sha256).hexdigest()
+
+    path = f'/mqtt?{query}&X-Amz-Signature={signature}'
+    if session_token:
+        path += f'&X-Amz-Security-Token={urllib.parse.quote(session_token, safe="")}'
+
+    return path
+
+
+class ShadowTransport(ABC):
+    @property
+    @abstractmethod
+    def connected(self) -> bool:
+        pass
+
+    @abstractmethod
+    def start(self, on_message, on_subscribed):
+        pass
+
+    @abstractmethod
+    def subscribe(self, topics: list):
+        pass
+
+    @abstractmethod
+    def publish(self, topic: str, payload: str):
+        pass
+
+    @abstractmethod
+    def stop(self):
+        pass
+
+
+class MqttTransport(ShadowTransport):
+    def __init__(self, host: str, port: int = 443, websockets: bool = True, tls: bool = True, path: str = '/mqtt',
+                 path_factory=None, keepalive: int = 60):
+        self._client = mqtt.Client(client_id=f'yandex-home-{os.urandom(6).hex()}',
+                                   transport='websockets' if websockets else 'tcp')
+        if tls:
+            self._client.tls_set_context(ssl.create_default_context())
+        self._client.on_connect = self._on_connect
+        self._client.on_disconnect = self._on_disconnect
+        self._client.on_subscribe = self._on_subscribe
+        self._client.on_message = self._on_message
+
+        self._host = host
+        self._port = port
+        self._websockets = websockets
+        self._path = path
+        self._path_factory = path_factory
+        self._keepalive = keepalive
+
+        self._topics = []
+        self._pending = {}
+        self._lock = Lock()
+        self._handle_message = None
+        self._handle_subscribed = None
+
+    @property
+    def connected(self) -> bool:
+        return self._client.is_connected()
+
+    def start(self, on_message, on_subscribed):
+        self._handle_message = on_message
+        self._handle_subscribed = on_subscribed
+
+        self._set_path()
+        self._client.connect_async(self._host, self._port, self._keepalive)
+        self._client.loop_start()
+
+    def subscribe(self, topics: list):
+        with self._lock:
+            self._topics.extend(topics)
+            if self._client.is_connected():
+                self._subscribe(topics)
+
+    def publish(self, topic: str, payload: str):
+        self._client.publish(topic, payload, qos=0)
+
+    def stop(self):
+        self._client.disconnect()
+        self._client.loop_stop()
+
+    def _set_path(self):
+        if self._websockets:
+            self._client.ws_set_options(path=self._path_factory() if self._path_factory else self._path)
+
+    def _subscribe(self, topics: list):
+        result, mid = self._client.subscribe([(topic, 1) for topic in topics])
+        if result == mqtt.MQTT_ERR_SUCCESS:
+            self._pending[mid] = topics
+
+    def _on_connect(self, client, userdata, flags, rc):
+        if rc != 0:
+            return
+
+        with self._lock:
+            if self._topics:
+                self._subscribe(list(self._topics))
+
+    def _on_disconnect(self, client, userdata, rc):
+        self._set_path()
+
+    def _on_subscribe(self, client, userdata, mid, granted_qos):
+        with self._lock:
+            topics = self._pending.pop(mid, [])
+
+        self._handle_subscribed(topics)
+
+    def _on_message(self, client, userdata, message):
+        self._handle_message(message.topic, message.payload)
+
+
+class ShadowSubscriber:
+    def __init__(self, transport: ShadowTransport, max_age: float = 10):
+        self._transport = transport
+        self._max_age = max_age
+        self._shadows = {}
+        self._updated = {}
+        self._lock = Lock()
+
+    def start(self):
+        self._transport.start(self._on_message, self._on_subscribed)
+
+    def stop(self):
+        self._transport.stop()
+
+    def add(self, device_id: str):
+        prefix = f'$aws/things/{device_id}/shadow'
+        self._transport.subscribe([f'{prefix}/update/documents', f'{prefix}/update/delta', f'{prefix}/get/accepted'])
+
+    def get(self, device_id: str) -> dict:
+        # Without a live connection updates are missed, so the shadow is only trusted for max_age
+        with self._lock:
+            if not self._transport.connected and \
+                    time.monotonic() - self._updated.get(device_id, float('-inf')) > self._max_age:
+                return None
+
+            return self._shadows.get(device_id)
+
+    def set(self, device_id: str, shadow: dict):
+        with self._lock:
+            self._replace(device_id, shadow)
+
+    def patch_desired(self, device_id: str, desired: dict):
+        with self._lock:
+            shadow = self._shadows.get(device_id)
+            if shadow is not None:
+                state = shadow.get('state', {})
+                self._shadows[device_id] = {**shadow, 'version': None,
+                                            'state': {**state, 'desired': {**state.get('desired', {}), **desired}}}
+
+    def _replace(self, device_id: str, shadow: dict):
+        current = self._shadows.get(device_id)
+        if current is not None and current.get('version') is not None and shadow.get('version') is not None \
+                and shadow['version'] < current['version']:
+            return
+
+        self._shadows[device_id] = shadow
+        self._updated[device_id] = time.monotonic()
+
+    def _on_subscribed(self, topics: list):
+        for topic in topics:
+            if topic.endswith('/get/accepted'):
+                self._transport.publish(topic[:-len('/accepted')], '{}')
+
+    def _on_message(self, topic: str, payload: bytes):
+        parts = topic.split('/')
+        if len(parts) < 6 or parts[0] != '$aws' or parts[1] != 'things':
+            return
+
+        device_id, kind = parts[2], '/'.join(parts[4:])
+        try:
+            message = codec.loads(payload)
+        except ValueError:
+            return
+
+        with self._lock:
+            if kind == 'update/documents':
+                self._replace(device_id, message['current'])
+            elif kind == 'get/accepted':
+                self._replace(device_id, message)
+            elif kind == 'update/delta':
+                shadow = self._shadows.get(device_id)
+                if shadow is None or (shadow.get('version') or 0) >= message.get('version', 0):
+                    return
+
+                state = shadow.get('state', {})
+                self._shadows[device_id] = {**shadow, 'version': message.get('version'),
+                                            'state': {**state, 'desired': {**state.get('desired', {}),
+                                                                           **message['state']}}}
+                self._updated[device_id] = time.monotonic()
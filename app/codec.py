@@ -0,0 +1,24 @@
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+if orjson is not None:
+    def dumps_bytes(obj, default=None) -> bytes:
+        return orjson.dumps(obj, default=default)
+
+    def dumps(obj, default=None) -> str:
+        return orjson.dumps(obj, default=default).decode()
+
+    loads = orjson.loads
+else:
+    def dumps(obj, default=None) -> str:
+        return json.dumps(obj, default=default, ensure_ascii=False, separators=(',', ':'))
+
+    def dumps_bytes(obj, default=None) -> bytes:
+        return dumps(obj, default=default).encode()
+
+    loads = json.loads
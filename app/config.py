@@ -11,6 +11,30 @@ APP_SSL_CRT = os.getenv('APP_SSL_CRT')
 APP_SSL_KEY = os.getenv('APP_SSL_KEY')
 APP_ID = os.getenv('APP_ID')
 APP_SECRET = os.getenv('APP_SECRET')
+APP_QUERY_TIMEOUT = float(os.getenv('APP_QUERY_TIMEOUT', default=2.5))
+APP_ACTION_TIMEOUT = float(os.getenv('APP_ACTION_TIMEOUT', default=2.5))
+APP_CLOUD_WORKERS = int(os.getenv('APP_CLOUD_WORKERS', default=4))
+APP_CREDENTIALS_PATH = os.getenv('APP_CREDENTIALS_PATH', default='credentials.bin')
+APP_WORKERS = int(os.getenv('APP_WORKERS', default=1))
+APP_THREADS = int(os.getenv('APP_THREADS', default=8))
+APP_KEEPALIVE = int(os.getenv('APP_KEEPALIVE', default=5))
+APP_GRACEFUL_TIMEOUT = int(os.getenv('APP_GRACEFUL_TIMEOUT', default=30))
+
+POLLER_ENABLED = os.getenv('POLLER_ENABLED', default='true').lower() == 'true'
+POLLER_ACTIVE_INTERVAL = float(os.getenv('POLLER_ACTIVE_INTERVAL', default=5))
+POLLER_IDLE_INTERVAL = float(os.getenv('POLLER_IDLE_INTERVAL', default=60))
+POLLER_BOOST_INTERVAL = float(os.getenv('POLLER_BOOST_INTERVAL', default=2))
+POLLER_BOOST_DURATION = float(os.getenv('POLLER_BOOST_DURATION', default=30))
+POLLER_MAX_AGE = float(os.getenv('POLLER_MAX_AGE', default=120))
+POLLER_BUDGET = int(os.getenv('POLLER_BUDGET', default=30))
+
+YANDEX_SKILL_ID = os.getenv('YANDEX_SKILL_ID')
+YANDEX_OAUTH_TOKEN = os.getenv('YANDEX_OAUTH_TOKEN')
+YANDEX_USER_ID = os.getenv('YANDEX_USER_ID')
+YANDEX_CALLBACK_URL = os.getenv('YANDEX_CALLBACK_URL',
+                                default=f'https://dialogs.yandex.net/api/v1/skills/{YANDEX_SKILL_ID}/callback/state')
+YANDEX_CALLBACK_DEBOUNCE = float(os.getenv('YANDEX_CALLBACK_DEBOUNCE', default=1))
+YANDEX_CALLBACK_RETRIES = int(os.getenv('YANDEX_CALLBACK_RETRIES', default=5))
 
 DB_HOST = os.getenv('DB_HOST')
 DB_PORT = int(os.getenv('DB_PORT', default=5432))
@@ -18,16 +42,41 @@ DB_USER = os.getenv('DB_USER')
 DB_PW = os.getenv('DB_PW')
 DB_NAME = os.getenv('DB_NAME')
 DB_URI = f'postgresql+psycopg2://{DB_USER}:{DB_PW}@{DB_HOST}:{DB_PORT}/{DB_NAME}'
+DB_USER_CACHE_TTL = float(os.getenv('DB_USER_CACHE_TTL', default=60))
+DB_USER_CACHE_SIZE = int(os.getenv('DB_USER_CACHE_SIZE', default=256))
+DB_PASSWORD_WORKERS = int(os.getenv('DB_PASSWORD_WORKERS', default=2))
+DB_PASSWORD_QUEUE = int(os.getenv('DB_PASSWORD_QUEUE', default=8))
 
 MI_CLOUD_USERNAME = os.getenv('MI_CLOUD_USERNAME')
 MI_CLOUD_PASSWORD = os.getenv('MI_CLOUD_PASSWORD')
 MI_CLOUD_VACUUM_TOKEN = os.getenv('MI_CLOUD_VACUUM_TOKEN')
 MI_CLOUD_FAN_TOKEN = os.getenv('MI_CLOUD_FAN_TOKEN')
 MI_CLOUD_HUMIDIFIER_TOKEN = os.getenv('MI_CLOUD_HUMIDIFIER_TOKEN')
+MI_CLOUD_WORKERS = int(os.getenv('MI_CLOUD_WORKERS', default=APP_CLOUD_WORKERS))
+MI_CLOUD_CACHE_TTL = float(os.getenv('MI_CLOUD_CACHE_TTL', default=10))
+MI_CLOUD_CACHE_SLOW_TTL = float(os.getenv('MI_CLOUD_CACHE_SLOW_TTL', default=120))
+MI_CLOUD_CACHE_SIZE = int(os.getenv('MI_CLOUD_CACHE_SIZE', default=1024))
+MI_CLOUD_CONNECTIONS = int(os.getenv('MI_CLOUD_CONNECTIONS', default=100))
+MI_CLOUD_CATALOG_PATH = os.getenv('MI_CLOUD_CATALOG_PATH', default='mi_cloud_catalog.json')
+MI_CLOUD_CATALOG_REFRESH = float(os.getenv('MI_CLOUD_CATALOG_REFRESH', default=3600))
 
 TCL_CLOUD_USERNAME = os.getenv('TCL_CLOUD_USERNAME')
 TCL_CLOUD_PASSWORD = os.getenv('TCL_CLOUD_PASSWORD')
+TCL_CLOUD_WORKERS = int(os.getenv('TCL_CLOUD_WORKERS', default=APP_CLOUD_WORKERS))
+TCL_CLOUD_CACHE_TTL = float(os.getenv('TCL_CLOUD_CACHE_TTL', default=10))
+TCL_CLOUD_CACHE_SIZE = int(os.getenv('TCL_CLOUD_CACHE_SIZE', default=64))
+TCL_CLOUD_MQTT = os.getenv('TCL_CLOUD_MQTT', default='true').lower() == 'true'
 
 DOMRU_TOKEN = os.getenv('DOMRU_TOKEN')
 DOMRU_PLACE_ID = os.getenv('DOMRU_PLACE_ID')
 DOMRU_CONTROL_ID = os.getenv('DOMRU_CONTROL_ID')
+DOMRU_WORKERS = int(os.getenv('DOMRU_WORKERS', default=APP_CLOUD_WORKERS))
+DOMRU_CONNECT_TIMEOUT = float(os.getenv('DOMRU_CONNECT_TIMEOUT', default=1))
+DOMRU_READ_TIMEOUT = float(os.getenv('DOMRU_READ_TIMEOUT', default=1.5))
+DOMRU_PING_INTERVAL = float(os.getenv('DOMRU_PING_INTERVAL', default=30))
+
+CLOUD_WORKERS = {
+    'MiCloud': MI_CLOUD_WORKERS,
+    'TclCloud': TCL_CLOUD_WORKERS,
+    'DomRuApi': DOMRU_WORKERS
+}
@@ -12,5 +12,6 @@ class User(db.Model):
     refresh_token = db.Column(db.Text, unique=True)
 
 
-with app.app_context():
+@app.cli.command('init-db')
+def init_db():
     db.create_all()
@@ -1,35 +1,73 @@
+from concurrent.futures import ThreadPoolExecutor
 from uuid import UUID
+from sqlalchemy import update
 from sqlalchemy.exc import IntegrityError
 from passlib.context import CryptContext
 
+from app import config
+from app.clouds.cache import StateCache
+from app.executors import BoundedExecutor
+
 from . import db, models
 
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+users = StateCache(config.DB_USER_CACHE_TTL, config.DB_USER_CACHE_SIZE)
+
+
+# bcrypt releases the GIL, a few dedicated threads keep hashing off the request threads
+def _create_password_pool() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(config.DB_PASSWORD_WORKERS, thread_name_prefix='Passwords')
+
+
+passwords = BoundedExecutor(_create_password_pool, config.DB_PASSWORD_WORKERS, config.DB_PASSWORD_QUEUE)
 
 
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return passwords.submit(pwd_context.verify, plain_password, hashed_password).result()
 
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return passwords.submit(pwd_context.hash, password).result()
 
 
 def object_as_dict(obj):
     return dict(filter(lambda item: not item[0].startswith('_'), obj.__dict__.items()))
 
 
+def _remember(user: dict) -> dict:
+    if user:
+        users.set(('username', user['username']), user)
+        if user['code'] is not None:
+            users.set(('code', str(user['code'])), user['username'])
+
+    return user
+
+
+def _forget(username: str) -> None:
+    users.delete(('username', username))
+
+
 def get_user_by_username(username: str) -> dict:
+    user = users.get(('username', username))
+    if user is not None:
+        return user
+
     user = models.User.query.filter_by(username=username).first()
 
-    return object_as_dict(user) if user else {}
+    return _remember(object_as_dict(user)) if user else {}
 
 
 def get_user_by_code(code: str) -> dict:
+    username = users.get(('code', str(code)))
+    if username is not None:
+        user = get_user_by_username(username)
+        if user and str(user['code']) == str(code):
+            return user
+
     user = models.User.query.filter_by(code=code).first()
 
-    return object_as_dict(user) if user else {}
+    return _remember(object_as_dict(user)) if user else {}
 
 
 def add_user(username: str, password: str) -> bool:
@@ -43,11 +81,11 @@ def add_user(username: str, password: str) -> bool:
 
 
 def update_user_code(username: str, code: UUID) -> None:
-    user = models.User.query.filter_by(username=username).first()
-    user.code = code
-
+    db.session.execute(update(models.User).where(models.User.username == username).values(code=code))
     db.session.commit()
 
+    _forget(username)
+
 
 def get_user_refresh_token(username: str) -> str:
     user = models.User.query.filter_by(username=username).first()
@@ -56,7 +94,22 @@ def get_user_refresh_token(username: str) -> str:
 
 
 def update_user_refresh_token(username: str, refresh_token: str) -> None:
-    user = models.User.query.filter_by(username=username).first()
-    user.refresh_token = refresh_token
+    db.session.execute(update(models.User).where(models.User.username == username)
+                       .values(refresh_token=refresh_token))
+    db.session.commit()
+
+    _forget(username)
+
 
+def rotate_user_refresh_token(username: str, old_refresh_token: str, refresh_token: str) -> bool:
+    result = db.session.execute(update(models.User)
+                                .where(models.User.username == username,
+                                       models.User.refresh_token == old_refresh_token)
+                                .values(refresh_token=refresh_token)
+                                .returning(models.User.id))
+    rotated = result.first() is not None
     db.session.commit()
+
+    _forget(username)
+
+    return rotated
@@ -1,6 +1,11 @@
+import time
+from threading import Thread
+
 from app import config
-from app.clouds.mi_cloud import MiCloud
+from app.clouds.mi_cloud_async import SyncMiCloud
 from app.clouds.tcl_cloud import TclCloud
+from app.clouds.credentials import CredentialStore
+from app.executors import shutdown_executors
 
 from .fan import Standing2Fan
 from .vacuum import Lite2Vacuum
@@ -8,26 +13,118 @@ from .humidifier import Humidifier2
 from .humidifier_sensor import Humidifier2Sensor
 from .intercom import DomRuApi
 from .ac import TclAC
+from .poller import Poller
+from .notifier import Notifier
+
+credentials = None
+mi_cloud = None
+intercom = None
+notifier = None
+poller = None
+devices = {}
+
+
+def create_devices():
+    global credentials, mi_cloud, intercom, notifier, poller
+    if devices:
+        return
+
+    if config.APP_SECRET and config.APP_CREDENTIALS_PATH:
+        credentials = CredentialStore(config.APP_CREDENTIALS_PATH, config.APP_SECRET)
+
+    # Xiaomi
+    mi_cloud = SyncMiCloud(config.MI_CLOUD_USERNAME, config.MI_CLOUD_PASSWORD, 'ru',
+                           cache_ttl=config.MI_CLOUD_CACHE_TTL, cache_size=config.MI_CLOUD_CACHE_SIZE,
+                           catalog_path=config.MI_CLOUD_CATALOG_PATH, login=False,
+                           connections=config.MI_CLOUD_CONNECTIONS, credentials=credentials)
+    fan = Standing2Fan(mi_cloud)
+    vacuum = Lite2Vacuum(mi_cloud)
+    humidifier = Humidifier2(mi_cloud)
+    humidifier_sensor = Humidifier2Sensor(mi_cloud)
+
+    # TCL
+    # tcl_cloud = TclCloud(config.TCL_CLOUD_USERNAME, config.TCL_CLOUD_PASSWORD, 'ru',
+    #                      cache_ttl=config.TCL_CLOUD_CACHE_TTL, cache_size=config.TCL_CLOUD_CACHE_SIZE, login=False,
+    #                      credentials=credentials)
+    # ac = TclAC(tcl_cloud)
+
+    # Custom devices
+    intercom = DomRuApi(config.DOMRU_TOKEN, config.DOMRU_PLACE_ID, config.DOMRU_CONTROL_ID,
+                        connect_timeout=config.DOMRU_CONNECT_TIMEOUT, read_timeout=config.DOMRU_READ_TIMEOUT)
+
+    devices.update({
+        'dmaker.fan.p18': fan,
+        'ijai.vacuum.v10': vacuum,
+        'deerma.humidifier.jsq2w': humidifier,
+        'deerma.humidifier.jsq2w.sensor': humidifier_sensor,
+        'domru.intercom.355': intercom,
+        # 'tcl.ac.355': ac
+    })
+
+    if config.YANDEX_OAUTH_TOKEN and config.YANDEX_USER_ID:
+        notifier = Notifier(config.YANDEX_CALLBACK_URL, config.YANDEX_OAUTH_TOKEN, config.YANDEX_USER_ID,
+                            debounce=config.YANDEX_CALLBACK_DEBOUNCE, retries=config.YANDEX_CALLBACK_RETRIES)
+
+    if config.POLLER_ENABLED:
+        poller = Poller(devices, active_interval=config.POLLER_ACTIVE_INTERVAL,
+                        idle_interval=config.POLLER_IDLE_INTERVAL, boost_interval=config.POLLER_BOOST_INTERVAL,
+                        boost_duration=config.POLLER_BOOST_DURATION, max_age=config.POLLER_MAX_AGE,
+                        budget=config.POLLER_BUDGET, notifier=notifier)
+
+
+def get_poller() -> Poller:
+    return poller
+
+
+def _connect(cloud, cloud_devices: list):
+    # A failed login or device lookup is retried until every device is ready, otherwise it stays unreachable
+    pending = list(cloud_devices)
+    delay = 1
+    while pending:
+        try:
+            if cloud.ready or cloud.login():
+                for device in list(pending):
+                    device.setup()
+                    if device.ready:
+                        pending.remove(device)
+        except Exception:
+            pass
+
+        if pending:
+            time.sleep(delay)
+            delay = min(delay * 2, 300)
+
+
+def start_devices():
+    create_devices()
+
+    clouds = {}
+    for device in devices.values():
+        if hasattr(device, 'setup'):
+            clouds.setdefault(device.cloud, []).append(device)
+
+    for cloud, cloud_devices in clouds.items():
+        Thread(target=_connect, args=(cloud, cloud_devices), name=f'{type(cloud).__name__}Login', daemon=True).start()
+
+    mi_cloud.start_catalog_refresh(config.MI_CLOUD_CATALOG_REFRESH)
+    # tcl_cloud.start_credentials_refresh()
+    intercom.start_keepalive(config.DOMRU_PING_INTERVAL)
+
+    if notifier:
+        notifier.start()
+    if poller:
+        poller.start()
+
+
+def stop_devices():
+    if poller:
+        poller.stop()
+
+    shutdown_executors()
+
+    if mi_cloud:
+        mi_cloud.close()
+
 
-# Xiaomi
-mi_cloud = MiCloud(config.MI_CLOUD_USERNAME, config.MI_CLOUD_PASSWORD, 'ru')
-fan = Standing2Fan(mi_cloud)
-vacuum = Lite2Vacuum(mi_cloud)
-humidifier = Humidifier2(mi_cloud)
-humidifier_sensor = Humidifier2Sensor(mi_cloud)
-
-# TCL
-# tcl_cloud = TclCloud(config.TCL_CLOUD_USERNAME, config.TCL_CLOUD_PASSWORD, 'ru')
-# ac = TclAC(tcl_cloud)
-
-# Custom devices
-intercom = DomRuApi(config.DOMRU_TOKEN, config.DOMRU_PLACE_ID, config.DOMRU_CONTROL_ID)
-
-devices = {
-    'dmaker.fan.p18': fan,
-    'ijai.vacuum.v10': vacuum,
-    'deerma.humidifier.jsq2w': humidifier,
-    'deerma.humidifier.jsq2w.sensor': humidifier_sensor,
-    'domru.intercom.355': intercom,
-    # 'tcl.ac.355': ac
-}
+def is_ready() -> bool:
+    return all(getattr(device, 'ready', True) for device in devices.values())
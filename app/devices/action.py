@@ -0,0 +1,40 @@
+from concurrent.futures import wait
+
+from app import config
+from app.executors import get_executor
+
+
+def _act(device, actions: list) -> list:
+    return [device.yandex_action(action['capabilities']) for action in actions]
+
+
+def _unreachable(action: dict) -> dict:
+    return {'id': action['id'], 'action_result': {
+        'status': 'ERROR',
+        'error_code': 'DEVICE_UNREACHABLE'
+    }}
+
+
+def act_on_devices(devices: dict, devices_action: list) -> list:
+    groups = {}
+    for action in devices_action:
+        groups.setdefault(action['id'], []).append(action)
+
+    futures = {}
+    for device_id, actions in groups.items():
+        device = devices[device_id]
+        if not getattr(device, 'ready', True):
+            continue
+
+        future = get_executor(getattr(device, 'cloud', device)).submit(_act, device, actions)
+        futures[future] = actions
+
+    done, _ = wait(futures, timeout=config.APP_ACTION_TIMEOUT)
+
+    results = {}
+    for future, actions in futures.items():
+        if future in done and future.exception() is None:
+            for action, capabilities in zip(actions, future.result()):
+                results[id(action)] = {**action, 'capabilities': capabilities}
+
+    return [results.get(id(action)) or _unreachable(action) for action in devices_action]
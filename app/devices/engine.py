@@ -0,0 +1,289 @@
+from abc import ABC, abstractmethod
+
+from app.clouds.mi_cloud import MiCloud
+from app.clouds.tcl_cloud import TclCloud
+from app.config import MI_CLOUD_CACHE_SLOW_TTL, TCL_CLOUD_MQTT
+
+
+class Codec:
+    modes = None
+
+    def decode(self, raw):
+        return raw
+
+    def encode(self, value):
+        return value
+
+
+class BoolCodec(Codec):
+    def decode(self, raw):
+        return bool(raw)
+
+    def encode(self, value):
+        return int(value)
+
+
+class InvertCodec(Codec):
+    def decode(self, raw):
+        return not raw
+
+    def encode(self, value):
+        return not value
+
+
+class EnumCodec(Codec):
+    def __init__(self, enum):
+        self._enum = enum
+        self.modes = [{'value': member.name} for member in enum]
+
+    def decode(self, raw):
+        return self._enum(raw).name
+
+    def encode(self, value):
+        return self._enum[value].value
+
+
+class MatchCodec(Codec):
+    def __init__(self, *values):
+        self._values = values
+
+    def decode(self, raw):
+        return raw in self._values
+
+
+IDENTITY = Codec()
+
+
+def _build_info(description: dict) -> dict:
+    info = {key: description[key] for key in ('id', 'name', 'room', 'type') if key in description}
+    info['capabilities'] = []
+    for capability in description.get('capabilities', []):
+        codec = capability.get('codec', IDENTITY)
+        parameters = {}
+        if capability['type'] != 'devices.capabilities.on_off':
+            parameters['instance'] = capability['instance']
+        if codec.modes is not None:
+            parameters['modes'] = codec.modes
+        if 'range' in capability:
+            parameters['range'] = capability['range']
+        if 'unit' in capability:
+            parameters['unit'] = capability['unit']
+
+        info['capabilities'].append({
+            'type': capability['type'],
+            'retrievable': capability.get('retrievable', True),
+            **({'reportable': True} if capability.get('reportable') else {}),
+            **({'parameters': parameters} if parameters else {})
+        })
+
+    info['properties'] = [{
+        'type': prop['type'],
+        'retrievable': True,
+        **({'reportable': True} if prop.get('reportable') else {}),
+        'parameters': {'instance': prop['instance'], 'unit': prop['unit']}
+    } for prop in description.get('properties', [])]
+
+    return info
+
+
+class Device(ABC):
+    DESCRIPTION = {}
+
+    def __init__(self):
+        description = self.DESCRIPTION
+        self.yandex_info = _build_info(description)
+        self._id = description['id']
+        self._capabilities = [(capability['type'], capability['instance'], capability['property'],
+                               capability.get('codec', IDENTITY))
+                              for capability in description.get('capabilities', [])
+                              if capability.get('retrievable', True)]
+        self._properties = [(prop['type'], prop['instance'], prop['property'], prop.get('codec', IDENTITY))
+                            for prop in description.get('properties', [])]
+        self._actions = {(capability['type'], capability['instance']): capability
+                         for capability in description.get('capabilities', [])}
+        self.reportable = {(item['type'], item['instance'])
+                           for item in description.get('capabilities', []) + description.get('properties', [])
+                           if item.get('reportable')}
+
+    @staticmethod
+    def _read(state: dict, source):
+        # A property that could not be read comes back as None and makes the whole status unavailable
+        values = tuple(state[name] for name in source) if isinstance(source, tuple) else (state[source],)
+        if None in values:
+            raise KeyError(source)
+
+        return values if isinstance(source, tuple) else values[0]
+
+    def build_status(self, state: dict):
+        return {
+            'id': self._id,
+            'capabilities': [{'type': type_, 'state': {'instance': instance,
+                                                       'value': codec.decode(self._read(state, source))}}
+                             for type_, instance, source, codec in self._capabilities],
+            'properties': [{'type': type_, 'state': {'instance': instance,
+                                                     'value': codec.decode(self._read(state, source))}}
+                           for type_, instance, source, codec in self._properties]
+        }
+
+    @property
+    def yandex_status(self):
+        return self.build_status(self.get_state())
+
+    @abstractmethod
+    def get_state(self) -> dict:
+        pass
+
+    def get_current_value(self, source):
+        return self._read(self.get_state(), source)
+
+    def encode_action(self, capability) -> tuple:
+        spec = self._actions.get((capability['type'], capability['state']['instance']))
+        if spec is None:
+            return None
+
+        value = capability['state']['value']
+        if 'range' in spec:
+            if capability['state'].get('relative'):
+                value += self.get_current_value(spec['property'])
+            if not spec['range']['min'] <= value <= spec['range']['max']:
+                return None
+
+        if 'actions' in spec:
+            return spec, spec['actions'].get(value)
+
+        try:
+            return spec, spec.get('codec', IDENTITY).encode(value)
+        except (KeyError, ValueError, TypeError):
+            return None
+
+    @staticmethod
+    def _action_result(capability, status: str) -> dict:
+        return {
+            'type': capability['type'],
+            'state': {'instance': capability['state']['instance'], 'action_result': {
+                'status': status
+            }}}
+
+
+class MiotDevice(Device):
+    TOKEN = None
+    MAPPING = {}
+    SLOW_PROPERTIES = ()
+
+    def __init__(self, cloud: MiCloud):
+        super().__init__()
+        self.__cloud = cloud
+
+        self.did = None
+
+        sources = {source for *_, source, _ in self._capabilities + self._properties}
+        self.mapping = {name: values for name, values in self.MAPPING.items() if name in sources}
+
+    def setup(self):
+        self.did = self.__cloud.get_device_id(self.TOKEN)
+        for name in self.SLOW_PROPERTIES:
+            self.__cloud.set_ttl(did=self.did, **self.MAPPING[name], ttl=MI_CLOUD_CACHE_SLOW_TTL)
+
+    @property
+    def ready(self) -> bool:
+        return self.did is not None and self.__cloud.ready
+
+    @property
+    def cloud(self) -> MiCloud:
+        return self.__cloud
+
+    def get_state(self) -> dict:
+        return self.__cloud.get_properties(did=self.did, mapping=self.mapping)
+
+    def get_current_value(self, source):
+        return self.__cloud.get_properties(did=self.did, mapping={source: self.MAPPING[source]})[source]
+
+    def get_action_value(self, capability) -> dict:
+        encoded = self.encode_action(capability)
+        if encoded is None or encoded[1] is None:
+            return None
+
+        spec, value = encoded
+        if 'actions' in spec:
+            return dict(self.MAPPING[value])
+
+        return {**self.MAPPING[spec['property']], 'value': value}
+
+    def yandex_action(self, capabilities):
+        values = [self.get_action_value(capability) for capability in capabilities]
+        writes = [value for value in values if value and 'piid' in value]
+        results = iter(self.__cloud.set_properties(self.did, writes) if writes else [])
+
+        capabilities_status = []
+        for capability, value in zip(capabilities, values):
+            if value is None:
+                done = False
+            elif 'aiid' in value:
+                done = bool(self.__cloud.call_action(did=self.did, **value))
+            else:
+                done = next(results)
+
+            capabilities_status.append(self._action_result(capability, 'DONE' if done else 'ERROR'))
+
+        return capabilities_status
+
+
+class ShadowDevice(Device):
+    DEVICE_ID = None
+
+    def __init__(self, cloud: TclCloud):
+        super().__init__()
+        self.__cloud = cloud
+
+        self.device_id = self.DEVICE_ID
+        self.__snapshot = (None, None)
+
+    def setup(self):
+        if TCL_CLOUD_MQTT:
+            self.__cloud.subscribe(self.device_id)
+
+    @property
+    def ready(self) -> bool:
+        return self.__cloud.ready
+
+    @property
+    def cloud(self) -> TclCloud:
+        return self.__cloud
+
+    @staticmethod
+    def _merge(shadow: dict) -> dict:
+        return {**shadow['state'].get('reported', {}), **shadow['state'].get('desired', {})}
+
+    def get_state(self) -> dict:
+        return self._merge(self.__cloud.get_info(self.device_id))
+
+    @property
+    def yandex_status(self):
+        shadow = self.__cloud.get_info(self.device_id)
+        version = shadow.get('version')
+        if version is not None and self.__snapshot[0] == version:
+            return self.__snapshot[1]
+
+        status = self.build_status(self._merge(shadow))
+        self.__snapshot = (version, status)
+
+        return status
+
+    def get_action_value(self, capability) -> dict:
+        encoded = self.encode_action(capability)
+        if encoded is None:
+            return None
+
+        spec, value = encoded
+        if isinstance(spec['property'], tuple):
+            return dict(zip(spec['property'], value))
+
+        return {spec['property']: value}
+
+    def yandex_action(self, capabilities):
+        values = [self.get_action_value(capability) for capability in capabilities]
+        desired = {key: value for action_value in values if action_value for key, value in action_value.items()}
+        done = bool(desired) and self.__cloud.send_action(self.device_id, **desired)
+
+        return [self._action_result(capability, 'DONE' if value and done else 'ERROR')
+                for capability, value in zip(capabilities, values)]
@@ -2,28 +2,64 @@
 
 import requests
 import random
+import time
+from threading import Thread
+
+from app import codec
+from app.metrics import LatencyStats
 
 
 class DomRuApi:
-    def __init__(self, token: str, place_id: int, control_id: int):
+    URL = 'https://api-mh.ertelecom.ru'
+
+    def __init__(self, token: str, place_id: int, control_id: int, connect_timeout: float = 2,
+                 read_timeout: float = 5):
+        self.__session = requests.session()
+        self.latency = LatencyStats()
+        self._timeout = (connect_timeout, read_timeout)
+        self._last_used = 0
+
         self._token = token
         self._place_id = place_id
         self._control_id = control_id
 
+    def start_keepalive(self, interval: float):
+        def ping():
+            while True:
+                time.sleep(max(self._last_used + interval - time.monotonic(), 0))
+                if time.monotonic() - self._last_used >= interval:
+                    self.__request('ping', 'HEAD', self.URL)
+
+        Thread(target=ping, name='DomRuKeepalive', daemon=True).start()
+
+    def __request(self, name: str, method: str, url: str, **kwargs) -> requests.Response:
+        started = time.monotonic()
+        try:
+            response = self.__session.request(method, url, timeout=self._timeout, **kwargs)
+        except requests.RequestException:
+            response = None
+        finished = time.monotonic()
+
+        self._last_used = finished
+        self.latency.observe(name, finished - started, response is not None and response.status_code < 500)
+
+        return response
+
     def open_door(self):
-        url = f'https://api-mh.ertelecom.ru/rest/v1/places/{self._place_id}/accesscontrols/{self._control_id}/actions'
+        url = f'{self.URL}/rest/v1/places/{self._place_id}/accesscontrols/{self._control_id}/actions'
         headers = {
             'User-Agent': self.__generate_agent(),
-            'Authorization': f'Bearer {self._token}'
+            'Authorization': f'Bearer {self._token}',
+            'Content-Type': 'application/json'
         }
-        data = {
+        data = codec.dumps_bytes({
             'name': 'accessControlOpen'
-        }
+        })
 
-        response = requests.post(url, headers=headers, json=data)
+        response = self.__request('open_door', 'POST', url, headers=headers, data=data)
 
-        if response.status_code == 200:
-            return response.json()['data']['status']
+        if response is not None and response.status_code == 200:
+            return codec.loads(response.content)['data']['status']
 
         return False
 
@@ -0,0 +1,124 @@
+import time
+from threading import Thread, Condition
+
+import requests
+
+from app import codec
+
+
+class Notifier:
+    THRESHOLDS = {
+        'temperature': 0.5,
+        'humidity': 2,
+        'battery_level': 5
+    }
+
+    def __init__(self, url: str, token: str, user_id: str, debounce: float = 1.0, retries: int = 5,
+                 thresholds: dict = None):
+        self._session = requests.session()
+        self._url = url
+        self._token = token
+        self._user_id = user_id
+        self._debounce = debounce
+        self._retries = retries
+        self._thresholds = thresholds if thresholds is not None else self.THRESHOLDS
+
+        self._reported = {}
+        self._pending = {}
+        self._condition = Condition()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = Thread(target=self._run, name='Notifier', daemon=True)
+            self._thread.start()
+
+    def update(self, device_id: str, status: dict, reportable=()):
+        with self._condition:
+            for group in ('capabilities', 'properties'):
+                for item in status.get(group, []):
+                    if (item['type'], item['state']['instance']) not in reportable:
+                        continue
+
+                    instance = item['state']['instance']
+                    value = item['state']['value']
+                    key = (device_id, group, item['type'], instance)
+
+                    if key not in self._reported:
+                        self._reported[key] = value
+                        continue
+                    if not self._is_changed(instance, self._reported[key], value):
+                        continue
+
+                    self._reported[key] = value
+                    self._pending.setdefault(device_id, {}).setdefault(group, {})[(item['type'], instance)] = value
+
+            if self._pending:
+                self._condition.notify()
+
+    def _is_changed(self, instance: str, previous, value) -> bool:
+        threshold = self._thresholds.get(instance)
+        if threshold is not None and isinstance(value, (int, float)) and isinstance(previous, (int, float)):
+            return abs(value - previous) >= threshold
+
+        return value != previous
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+
+            time.sleep(self._debounce)
+
+            with self._condition:
+                pending, self._pending = self._pending, {}
+
+            if not self._send(pending):
+                self._requeue(pending)
+
+    def _requeue(self, pending: dict):
+        # Values in _reported already moved on, so a failed batch is retried unless newer values replaced it
+        with self._condition:
+            for device_id, groups in pending.items():
+                for group, items in groups.items():
+                    queued = self._pending.setdefault(device_id, {}).setdefault(group, {})
+                    for key, value in items.items():
+                        queued.setdefault(key, value)
+
+    def _send(self, pending: dict) -> bool:
+        headers = {
+            'Authorization': f'OAuth {self._token}',
+            'Content-Type': 'application/json'
+        }
+        data = codec.dumps_bytes({
+            'ts': time.time(),
+            'payload': {
+                'user_id': self._user_id,
+                'devices': [
+                    {
+                        'id': device_id,
+                        **{group: [{'type': type_, 'state': {'instance': instance, 'value': value}}
+                                   for (type_, instance), value in items.items()]
+                           for group, items in groups.items()}
+                    } for device_id, groups in pending.items()
+                ]
+            }
+        })
+
+        delay = 1
+        for _ in range(self._retries):
+            try:
+                response = self._session.post(self._url, headers=headers, data=data, timeout=5)
+            except requests.RequestException:
+                response = None
+            if response is not None and response.status_code < 300:
+                return True
+            # A rejected payload would be rejected again, so it is not requeued
+            if response is not None and 400 <= response.status_code < 500 and response.status_code != 429:
+                return True
+
+            time.sleep(delay)
+            delay *= 2
+
+        return False
@@ -0,0 +1,171 @@
+import math
+import time
+from collections import deque
+from threading import Thread, Lock, Event
+
+from .query import query_devices, _unreachable
+
+
+class CallBudget:
+    def __init__(self, calls_per_minute: int):
+        self._calls_per_minute = calls_per_minute
+        self._calls = deque()
+        self._lock = Lock()
+
+    def acquire(self, calls: int = 1) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            while self._calls and self._calls[0] <= now - 60:
+                self._calls.popleft()
+
+            if len(self._calls) + calls > self._calls_per_minute:
+                return False
+
+            self._calls.extend([now] * calls)
+            return True
+
+
+class Poller:
+    def __init__(self, devices: dict, active_interval: float = 5, idle_interval: float = 60,
+                 boost_interval: float = 2, boost_duration: float = 30, max_age: float = 120, budget: int = 30,
+                 notifier=None):
+        self._devices = {device_id: device for device_id, device in devices.items() if hasattr(device, 'cloud')}
+        self._active_interval = active_interval
+        self._idle_interval = idle_interval
+        self._boost_interval = boost_interval
+        self._boost_duration = boost_duration
+        self._max_age = max_age
+        self._budget = budget
+        self._notifier = notifier
+
+        self._budgets = {}
+        self._snapshots = {}
+        self._next_poll = {device_id: 0 for device_id in self._devices}
+        self._boosted_until = {}
+        self._lock = Lock()
+        self._stopped = Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = Thread(target=self._run, name='Poller', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def boost(self, device_id: str):
+        with self._lock:
+            self._snapshots.pop(device_id, None)
+            if device_id in self._devices:
+                now = time.monotonic()
+                self._boosted_until[device_id] = now + self._boost_duration
+                self._next_poll[device_id] = now + self._boost_interval
+
+    def get_snapshot(self, device_id: str) -> dict:
+        with self._lock:
+            snapshot = self._snapshots.get(device_id)
+            if snapshot is None or snapshot[0] < time.monotonic() - self._max_age:
+                return None
+
+            return snapshot[1]
+
+    def query(self, devices: dict) -> list:
+        statuses = {device_id: self.get_snapshot(device_id) for device_id in devices}
+
+        groups = {}
+        for device_id, device in devices.items():
+            if statuses[device_id] is None:
+                groups.setdefault(getattr(device, 'cloud', None), {})[device_id] = device
+
+        missing = {}
+        for cloud, group in groups.items():
+            if cloud is None or self._get_budget(cloud).acquire(self._count_calls(cloud, group)):
+                missing.update(group)
+                continue
+
+            # Over the account budget the last known state is served, however old
+            with self._lock:
+                for device_id in group:
+                    snapshot = self._snapshots.get(device_id)
+                    statuses[device_id] = snapshot[1] if snapshot else None
+
+        if missing:
+            fetched = query_devices(missing)
+            self._store(missing, fetched)
+            statuses.update(zip(missing, fetched))
+
+        return [statuses[device_id] or _unreachable(device_id) for device_id in devices]
+
+    def _get_budget(self, cloud) -> CallBudget:
+        with self._lock:
+            return self._budgets.setdefault(cloud, CallBudget(self._budget))
+
+    @staticmethod
+    def _count_calls(cloud, devices: dict) -> int:
+        devices = [device for device in devices.values() if getattr(device, 'ready', True)]
+        if not hasattr(cloud, 'get_properties_batch'):
+            return len(devices)
+
+        keys = {(device.did, values['siid'], values['piid'])
+                for device in devices for values in device.mapping.values() if 'piid' in values}
+
+        return math.ceil(len(keys) / cloud.PROP_GET_CHUNK_SIZE)
+
+    def _store(self, devices: dict, statuses: list):
+        now = time.monotonic()
+        with self._lock:
+            for device_id, status in zip(devices, statuses):
+                if 'error_code' in status:
+                    continue
+
+                self._snapshots[device_id] = (now, status)
+                if self._notifier is not None:
+                    self._notifier.update(device_id, status, getattr(devices[device_id], 'reportable', ()))
+                if device_id not in self._devices:
+                    continue
+
+                if self._boosted_until.get(device_id, 0) > now:
+                    interval = self._boost_interval
+                elif self._is_active(status):
+                    interval = self._active_interval
+                else:
+                    interval = self._idle_interval
+                self._next_poll[device_id] = now + interval
+
+    def _run(self):
+        while not self._stopped.is_set():
+            now = time.monotonic()
+            with self._lock:
+                due = [device_id for device_id, next_poll in self._next_poll.items() if next_poll <= now]
+
+            groups = {}
+            for device_id in due:
+                groups.setdefault(self._devices[device_id].cloud, {})[device_id] = self._devices[device_id]
+
+            for cloud, devices in groups.items():
+                if not self._get_budget(cloud).acquire(self._count_calls(cloud, devices)):
+                    with self._lock:
+                        for device_id in devices:
+                            self._next_poll[device_id] = now + self._boost_interval
+                    continue
+
+                try:
+                    self._store(devices, query_devices(devices, use_cache=False))
+                except Exception:
+                    pass
+
+                with self._lock:
+                    for device_id in devices:
+                        if self._next_poll[device_id] <= now:
+                            self._next_poll[device_id] = now + self._active_interval
+
+            self._stopped.wait(0.5)
+
+    @staticmethod
+    def _is_active(status: dict) -> bool:
+        return any(capability['type'] == 'devices.capabilities.on_off' and capability['state']['value']
+                   for capability in status.get('capabilities', []))
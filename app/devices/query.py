@@ -0,0 +1,52 @@
+from concurrent.futures import wait
+
+from app import config
+from app.clouds.mi_cloud import MiCloud
+from app.executors import get_executor
+
+
+def _query_batch(cloud: MiCloud, devices: dict, use_cache: bool) -> dict:
+    states = cloud.get_properties_batch([(device.did, device.mapping) for device in devices.values()], use_cache)
+
+    statuses = {}
+    for (device_id, device), state in zip(devices.items(), states):
+        # An offline device has no values and must not hide the other devices of the account
+        try:
+            statuses[device_id] = device.build_status(state)
+        except (KeyError, ValueError, TypeError):
+            pass
+
+    return statuses
+
+
+def _query_single(device_id: str, device) -> dict:
+    return {device_id: device.yandex_status}
+
+
+def _unreachable(device_id: str) -> dict:
+    return {'id': device_id, 'error_code': 'DEVICE_UNREACHABLE', 'error_message': 'Device is not responding'}
+
+
+def query_devices(devices: dict, use_cache: bool = True) -> list:
+    batches = {}
+    futures = []
+    for device_id, device in devices.items():
+        cloud = getattr(device, 'cloud', device)
+        if not getattr(device, 'ready', True):
+            continue
+        elif isinstance(cloud, MiCloud):
+            batches.setdefault(cloud, {})[device_id] = device
+        else:
+            futures.append(get_executor(cloud).submit(_query_single, device_id, device))
+
+    for cloud, batch in batches.items():
+        futures.append(get_executor(cloud).submit(_query_batch, cloud, batch, use_cache))
+
+    done, _ = wait(futures, timeout=config.APP_QUERY_TIMEOUT)
+
+    statuses = {}
+    for future in done:
+        if future.exception() is None:
+            statuses.update(future.result())
+
+    return [statuses.get(device_id) or _unreachable(device_id) for device_id in devices]
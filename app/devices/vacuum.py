@@ -2,9 +2,10 @@
 
 from enum import Enum
 
-from app.clouds.mi_cloud import MiCloud
 from app.config import MI_CLOUD_VACUUM_TOKEN
 
+from .engine import MiotDevice, EnumCodec, MatchCodec
+
 
 class SweepMode(Enum):
     one = 0
@@ -25,208 +26,39 @@ class WaterLevel(Enum):
     high = 2
 
 
-class Lite2Vacuum:
-    def __init__(self, cloud: MiCloud):
-        self.__cloud = cloud
-
-        self.did = self.__cloud.get_device_id(MI_CLOUD_VACUUM_TOKEN)
-
-        # https://home.miot-spec.com/spec/ijai.vacuum.v10
-        self.mapping = {
-            'state': {'siid': 2, 'piid': 1},
-            'sweep_mode': {'siid': 2, 'piid': 4},
-            'work_speed': {'siid': 7, 'piid': 5},
-            'water_level': {'siid': 7, 'piid': 6},
-            'start': {'siid': 2, 'aiid': 1},
-            'stop': {'siid': 2, 'aiid': 2},
-            'home': {'siid': 3, 'aiid': 1},
-            'battery': {'siid': 3, 'piid': 1}
-        }
-
-    def set_state(self, state: bool) -> bool:
-        if state:
-            return self.__cloud.call_action(did=self.did, **self.mapping['start'])
-        return self.__cloud.call_action(did=self.did, **self.mapping['home'])
-
-    def set_sweep_mode(self, sweep_mode: SweepMode) -> bool:
-        return self.__cloud.set_property(did=self.did, **self.mapping['sweep_mode'],
-                                         value=sweep_mode.value)
-
-    def set_work_speed(self, work_speed: WorkSpeed) -> bool:
-        return self.__cloud.set_property(did=self.did, **self.mapping['work_speed'],
-                                         value=work_speed.value)
-
-    def set_water_level(self, water_level: WaterLevel) -> bool:
-        return self.__cloud.set_property(did=self.did, **self.mapping['water_level'],
-                                         value=water_level.value)
-
-    def set_pause(self, pause: bool) -> bool:
-        if pause:
-            return self.__cloud.call_action(did=self.did, **self.mapping['stop'])
-        return self.__cloud.call_action(did=self.did, **self.mapping['start'])
-
-    @property
-    def state(self) -> bool:
-        return self.__cloud.get_property(did=self.did, **self.mapping['state'])
-
-    @property
-    def sweep_mode(self) -> str:
-        return SweepMode(self.__cloud.get_property(did=self.did, **self.mapping['sweep_mode'])).name
-
-    @property
-    def work_speed(self) -> str:
-        return WorkSpeed(self.__cloud.get_property(did=self.did, **self.mapping['work_speed'])).name
-
-    @property
-    def water_level(self) -> str:
-        return WaterLevel(self.__cloud.get_property(did=self.did, **self.mapping['water_level'])).name
-
-    @property
-    def battery(self) -> int:
-        return self.__cloud.get_property(did=self.did, **self.mapping['battery'])
-
-    @property
-    def yandex_info(self):
-        return {
-            'id': 'ijai.vacuum.v10',
-            'name': 'Пылесос',
-            'room': 'Гостиная',
-            'type': 'devices.types.vacuum_cleaner',
-            'capabilities': [
-                {
-                    'type': 'devices.capabilities.on_off',
-                    'retrievable': True
-                },
-                {
-                    'type': 'devices.capabilities.mode',
-                    'retrievable': True,
-                    'parameters': {
-                        'instance': 'cleanup_mode',
-                        'modes': [
-                            {
-                                'value': 'one'
-                            },
-                            {
-                                'value': 'two'
-                            },
-                            {
-                                'value': 'three'
-                            }
-                        ]
-                    }
-                },
-                {
-                    'type': 'devices.capabilities.mode',
-                    'retrievable': True,
-                    'parameters': {
-                        'instance': 'work_speed',
-                        'modes': [
-                            {
-                                'value': 'eco'
-                            },
-                            {
-                                'value': 'normal'
-                            },
-                            {
-                                'value': 'medium'
-                            },
-                            {
-                                'value': 'turbo'
-                            }
-                        ]
-                    }
-                },
-                {
-                    'type': 'devices.capabilities.toggle',
-                    'retrievable': True,
-                    'parameters': {
-                        'instance': 'pause'
-                    }
-                }
-            ],
-            'properties': [
-                {
-                    'type': 'devices.properties.float',
-                    'retrievable': True,
-                    'parameters': {
-                        'instance': 'battery_level',
-                        'unit': 'unit.percent'
-                    }
-                }
-            ]
-        }
-
-    @property
-    def yandex_status(self):
-        return {
-            'id': 'ijai.vacuum.v10',
-            'capabilities': [
-                {
-                    'type': 'devices.capabilities.on_off',
-                    'state': {
-                        'instance': 'on',
-                        'value': self.state in (2, 5, 6, 7)
-                    }
-                },
-                {
-                    'type': 'devices.capabilities.mode',
-                    'state': {
-                        'instance': 'cleanup_mode',
-                        'value': self.sweep_mode
-                    }
-                },
-                {
-                    'type': 'devices.capabilities.mode',
-                    'state': {
-                        'instance': 'work_speed',
-                        'value': self.work_speed
-                    }
-                },
-                {
-                    'type': 'devices.capabilities.toggle',
-                    'state': {
-                        'instance': 'pause',
-                        'value': self.state in (1, 2)
-                    }
-                }
-            ],
-            'properties': [
-                {
-                    'type': 'devices.properties.float',
-                    'state': {
-                        'instance': 'battery_level',
-                        'value': self.battery
-                    }
-                }
-            ]
-        }
-
-    def yandex_action(self, capabilities):
-        capabilities_status = []
-
-        status = 'ERROR'
-        for capability in capabilities:
-            if capability['type'] == 'devices.capabilities.on_off':
-                if self.set_state(capability['state']['value']):
-                    status = 'DONE'
-
-            elif capability['type'] == 'devices.capabilities.mode':
-                if capability['state']['instance'] == 'cleanup_mode':
-                    if self.set_sweep_mode(SweepMode[capability['state']['value']]):
-                        status = 'DONE'
-                elif capability['state']['instance'] == 'work_speed':
-                    if self.set_work_speed(WorkSpeed[capability['state']['value']]):
-                        status = 'DONE'
-
-            elif capability['type'] == 'devices.capabilities.toggle':
-                if capability['state']['instance'] == 'pause':
-                    if self.set_pause(capability['state']['value']):
-                        status = 'DONE'
-
-            capabilities_status.append({
-                'type': capability['type'],
-                'state': {'instance': capability['state']['instance'], 'action_result': {
-                    'status': status
-                }}})
-
-        return capabilities_status
+class Lite2Vacuum(MiotDevice):
+    TOKEN = MI_CLOUD_VACUUM_TOKEN
+    SLOW_PROPERTIES = ('battery',)
+
+    # https://home.miot-spec.com/spec/ijai.vacuum.v10
+    MAPPING = {
+        'state': {'siid': 2, 'piid': 1},
+        'sweep_mode': {'siid': 2, 'piid': 4},
+        'work_speed': {'siid': 7, 'piid': 5},
+        'water_level': {'siid': 7, 'piid': 6},
+        'start': {'siid': 2, 'aiid': 1},
+        'stop': {'siid': 2, 'aiid': 2},
+        'home': {'siid': 3, 'aiid': 1},
+        'battery': {'siid': 3, 'piid': 1}
+    }
+
+    DESCRIPTION = {
+        'id': 'ijai.vacuum.v10',
+        'name': 'Пылесос',
+        'room': 'Гостиная',
+        'type': 'devices.types.vacuum_cleaner',
+        'capabilities': [
+            {'type': 'devices.capabilities.on_off', 'instance': 'on', 'property': 'state',
+             'codec': MatchCodec(2, 5, 6, 7), 'actions': {True: 'start', False: 'home'}},
+            {'type': 'devices.capabilities.mode', 'instance': 'cleanup_mode', 'property': 'sweep_mode',
+             'codec': EnumCodec(SweepMode)},
+            {'type': 'devices.capabilities.mode', 'instance': 'work_speed', 'property': 'work_speed',
+             'codec': EnumCodec(WorkSpeed)},
+            {'type': 'devices.capabilities.toggle', 'instance': 'pause', 'property': 'state',
+             'codec': MatchCodec(1, 2), 'actions': {True: 'stop', False: 'start'}}
+        ],
+        'properties': [
+            {'type': 'devices.properties.float', 'instance': 'battery_level', 'property': 'battery',
+             'unit': 'unit.percent'}
+        ]
+    }
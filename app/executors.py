@@ -0,0 +1,96 @@
+from concurrent.futures import Executor, ThreadPoolExecutor
+from threading import Lock
+from typing import Callable
+
+from app import config
+
+
+_executors = {}
+_lock = Lock()
+
+
+def get_executor(key) -> ThreadPoolExecutor:
+    with _lock:
+        if key not in _executors:
+            # Subclasses such as SyncMiCloud share the pool size of the cloud they extend
+            name = next((cls.__name__ for cls in type(key).__mro__ if cls.__name__ in config.CLOUD_WORKERS),
+                        type(key).__name__)
+            max_workers = config.CLOUD_WORKERS.get(name, config.APP_CLOUD_WORKERS)
+            _executors[key] = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+
+        return _executors[key]
+
+
+def shutdown_executors(wait: bool = True):
+    with _lock:
+        executors = list(_executors.values())
+        _executors.clear()
+
+    for executor in executors:
+        executor.shutdown(wait=wait)
+
+
+class ExecutorBusyError(RuntimeError):
+    pass
+
+
+class BoundedExecutor:
+    def __init__(self, factory: Callable[[], Executor], workers: int, queue: int):
+        self._factory = factory
+        self._executor = None
+        self._workers = workers
+        self._limit = workers + queue
+        self._lock = Lock()
+
+        self._pending = 0
+        self._peak = 0
+        self._completed = 0
+        self._rejected = 0
+
+    def submit(self, fn, *args, **kwargs):
+        with self._lock:
+            if self._pending >= self._limit:
+                self._rejected += 1
+                raise ExecutorBusyError(f'{self._pending} tasks are already pending')
+
+            if self._executor is None:
+                self._executor = self._factory()
+
+            self._pending += 1
+            self._peak = max(self._peak, self._pending)
+            executor = self._executor
+
+        try:
+            future = executor.submit(fn, *args, **kwargs)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+
+        future.add_done_callback(self._done)
+
+        return future
+
+    def _done(self, _):
+        with self._lock:
+            self._pending -= 1
+            self._completed += 1
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    @property
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'workers': self._workers,
+                'running': min(self._pending, self._workers),
+                'queued': max(self._pending - self._workers, 0),
+                'peak': self._peak,
+                'completed': self._completed,
+                'rejected': self._rejected
+            }
@@ -1,19 +1,60 @@
-from flask import request
+import hashlib
 
-from app import app
-from app.jwt import get_payload
-from app.devices import devices
+from flask import request, Response
+
+from app import app, codec
+from app.jwt import get_payload, forget_subject
+from app.db.utils import passwords
+from app.devices import devices, get_poller, is_ready
+from app.devices.action import act_on_devices
+from app.devices.query import query_devices
+
+
+_devices_info = None
+
+
+def _get_devices_info() -> tuple:
+    global _devices_info
+    if _devices_info is None:
+        body = codec.dumps_bytes([device.yandex_info for device in devices.values()])
+        _devices_info = body, hashlib.sha1(body).hexdigest()
+
+    return _devices_info
 
 
 @app.route('/v1.0', methods=['HEAD'])
 def get_app_status():
-    return '', 200
+    return '', 200 if is_ready() else 503
+
+
+@app.route('/v1.0/stats', methods=['GET'])
+def get_app_stats():
+    access_token = request.headers['Authorization'].split()[-1]
+
+    try:
+        get_payload(access_token)
+    except ValueError as exc:
+        return str(exc), 403
+
+    clouds = {device.cloud for device in devices.values() if hasattr(device, 'cloud')}
+
+    return {
+        'cache': {type(cloud).__name__: cloud.cache.stats for cloud in clouds},
+        'latency': {type(device).__name__: device.latency.stats for device in devices.values()
+                    if hasattr(device, 'latency')},
+        'passwords': passwords.stats
+    }, 200
 
 
 @app.route('/v1.0/user/unlink', methods=['POST'])
 def get_unlink_status():
     request_id = request.headers['X-Request-Id']
 
+    try:
+        forget_subject(get_payload(request.headers['Authorization'].split()[-1])['sub'])
+    except (KeyError, ValueError):
+        pass
+
     return {'request_id': request_id}, 200
 
 
@@ -27,9 +68,19 @@ def get_user_devices():
     except ValueError as exc:
         return exc, 403
 
-    devices_info = [device.yandex_info for device in devices.values()]
+    devices_info, etag = _get_devices_info()
+    etag = f'{etag}-{hashlib.sha1(payload["sub"].encode()).hexdigest()[:16]}'
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = Response(b''.join((
+            b'{"request_id":', codec.dumps_bytes(request_id),
+            b',"payload":{"user_id":', codec.dumps_bytes(payload['sub']),
+            b',"devices":', devices_info, b'}}'
+        )), mimetype='application/json')
+    response.set_etag(etag, weak=True)
 
-    return {'request_id': request_id, 'payload': {'user_id': payload['sub'], 'devices': devices_info}}, 200
+    return response
 
 
 @app.route('/v1.0/user/devices/query', methods=['POST'])
@@ -42,9 +93,9 @@ def get_user_device_status():
     except ValueError as exc:
         return exc, 403
 
-    devices_status = []
-    for device in request.json['devices']:
-        devices_status.append(devices[device['id']].yandex_status)
+    devices_query = {device['id']: devices[device['id']] for device in request.json['devices']}
+    poller = get_poller()
+    devices_status = poller.query(devices_query) if poller else query_devices(devices_query)
 
     return {'request_id': request_id, 'payload': {'devices': devices_status}}, 200
 
@@ -59,9 +110,10 @@ def send_action_to_user_device():
     except ValueError as exc:
         return exc, 403
 
-    devices_action = request.json['payload']['devices']
-    for i, device in enumerate(devices_action):
-        capabilities = devices_action[i]['capabilities']
-        devices_action[i]['capabilities'] = devices[device['id']].yandex_action(capabilities)
+    devices_action = act_on_devices(devices, request.json['payload']['devices'])
+    poller = get_poller()
+    if poller:
+        for device in devices_action:
+            poller.boost(device['id'])
 
     return {'request_id': request_id, 'payload': {'devices': devices_action}}, 200
@@ -2,6 +2,7 @@ from flask import request, redirect, render_template, session, flash
 from uuid import uuid4
 
 from app import app, config
+from app.executors import ExecutorBusyError
 from app.forms import RegisterForm, LoginForm
 from app.jwt import create_access_token, create_refresh_token, get_payload, is_token_expired
 from app.db.utils import (
@@ -10,7 +11,8 @@ from app.db.utils import (
     get_user_by_code,
     add_user,
     update_user_code,
-    update_user_refresh_token
+    update_user_refresh_token,
+    rotate_user_refresh_token
 )
 
 
@@ -21,11 +23,15 @@ def oauth_register():
     form = RegisterForm()
     if form.validate_on_submit():
         if request.form['secret_key'] == config.APP_SECRET:
-            user_added = add_user(request.form['username'], request.form['password'])
-            if user_added:
-                flash('Пользователь успешно зарегистрирован!')
+            try:
+                user_added = add_user(request.form['username'], request.form['password'])
+            except ExecutorBusyError:
+                flash('Сервер перегружен, попробуйте позже!')
             else:
-                flash('Пользователь с таким именем уже существует!')
+                if user_added:
+                    flash('Пользователь успешно зарегистрирован!')
+                else:
+                    flash('Пользователь с таким именем уже существует!')
         else:
             flash('Неверный ключ разработчика!')
 
@@ -40,7 +46,12 @@ def oauth_login():
     form = LoginForm()
     if form.validate_on_submit():
         user = get_user_by_username(form.username.data)
-        if user and verify_password(form.password.data, user['hashed_password']):
+        try:
+            verified = bool(user) and verify_password(form.password.data, user['hashed_password'])
+        except ExecutorBusyError:
+            verified = None
+
+        if verified:
             code = uuid4()
             state = request.args['state']
             client_id = request.args['client_id']
@@ -51,7 +62,8 @@ def oauth_login():
             return redirect(f'https://social.yandex.net/broker/redirect?'
                             f'code={code}&state={state}&client_id={client_id}&scope={scope}')
 
-        flash('Неверный логин или пароль!', 'error')
+        flash('Неверный логин или пароль!' if verified is not None else 'Сервер перегружен, попробуйте позже!',
+              'error')
 
     return render_template('login.html', title='Вход', form=form,
                            params='?' + '&'.join(f'{k}={v}' for k, v in request.args.items()))
@@ -74,23 +86,21 @@ def oauth_token():
 
 @app.route('/oauth/refresh', methods=['POST'])
 def oauth_refresh():
-    refresh_token = request.form['refresh_token']
+    old_refresh_token = request.form['refresh_token']
 
     try:
-        payload = get_payload(refresh_token)
+        payload = get_payload(old_refresh_token)
     except ValueError:
         return 'Invalid token', 403
 
-    if get_user_by_username(payload['sub'])['refresh_token'] != refresh_token:
-        return 'Invalid token', 403
-
     if is_token_expired(payload):
         return 'Expired token', 403
 
     access_token, expires_in = create_access_token(payload['sub'])
     refresh_token = create_refresh_token(payload['sub'])
 
-    update_user_refresh_token(payload['sub'], refresh_token)
+    if not rotate_user_refresh_token(payload['sub'], old_refresh_token, refresh_token):
+        return 'Invalid token', 403
 
     return {'access_token': access_token, 'token_type': 'bearer', 'expires_in': expires_in,
             'refresh_token': refresh_token}, 200
@@ -1,15 +1,29 @@
 import base64
 import hmac
-import json
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
+from threading import Lock
 
-from app import config
+from app import config, codec
 
 
 CLIENT_SECRET = config.APP_SECRET
 ALGORITHM = 'SHA256'
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 REFRESH_TOKEN_EXPIRE_DAYS = 90
+TOKEN_CACHE_SIZE = 1024
+
+_signer = hmac.new(CLIENT_SECRET.encode(), digestmod=ALGORITHM) if CLIENT_SECRET else None
+_verified = OrderedDict()
+_verified_lock = Lock()
+
+
+def _sign(message: bytes) -> bytes:
+    signer = _signer.copy()
+    signer.update(message)
+
+    return signer.digest()
 
 
 def _encode(payload: dict) -> str:
@@ -18,11 +32,11 @@ def _encode(payload: dict) -> str:
         'typ': 'JWT'
     }
 
-    header_encoded = base64.urlsafe_b64encode(json.dumps(header).encode()).rstrip(b'=').decode()
-    payload_encoded = base64.urlsafe_b64encode(json.dumps(payload).encode()).rstrip(b'=').decode()
+    header_encoded = base64.urlsafe_b64encode(codec.dumps_bytes(header)).rstrip(b'=').decode()
+    payload_encoded = base64.urlsafe_b64encode(codec.dumps_bytes(payload)).rstrip(b'=').decode()
 
     message = f'{header_encoded}.{payload_encoded}'.encode()
-    signature = hmac.new(CLIENT_SECRET.encode(), message, digestmod=ALGORITHM).digest()
+    signature = _sign(message)
     signature_encoded = base64.urlsafe_b64encode(signature).rstrip(b'=').decode()
 
     jwt_token = f'{header_encoded}.{payload_encoded}.{signature_encoded}'
@@ -49,23 +63,48 @@ def create_refresh_token(subject: str) -> str:
     return _encode(payload)
 
 
-def get_payload(jwt_token: str) -> dict:
+def _verify(jwt_token: str) -> tuple:
     header_encoded, payload_encoded, signature_encoded = jwt_token.split('.')
 
-    payload = json.loads(base64.urlsafe_b64decode(payload_encoded + "==="))
-
-    message = f"{header_encoded}.{payload_encoded}".encode()
-    expected_signature = hmac.new(CLIENT_SECRET.encode(), message, digestmod=ALGORITHM).digest()
-    actual_signature = base64.urlsafe_b64decode(signature_encoded + "===")
+    expected_signature = _sign(f'{header_encoded}.{payload_encoded}'.encode())
+    actual_signature = base64.urlsafe_b64decode(signature_encoded + '===')
 
-    if expected_signature != actual_signature:
+    if not hmac.compare_digest(expected_signature, actual_signature):
         raise ValueError('Invalid token')
 
-    if datetime.utcnow() > datetime.fromisoformat(payload['exp']):
+    payload = codec.loads(base64.urlsafe_b64decode(payload_encoded + '==='))
+    expires_at = (datetime.fromisoformat(payload['exp']) - datetime(1970, 1, 1)).total_seconds()
+
+    return payload, expires_at
+
+
+def get_payload(jwt_token: str) -> dict:
+    with _verified_lock:
+        entry = _verified.get(jwt_token)
+        if entry is not None:
+            _verified.move_to_end(jwt_token)
+
+    if entry is None:
+        entry = _verify(jwt_token)
+        with _verified_lock:
+            _verified[jwt_token] = entry
+            while len(_verified) > TOKEN_CACHE_SIZE:
+                _verified.popitem(last=False)
+
+    payload, expires_at = entry
+    if time.time() > expires_at:
+        with _verified_lock:
+            _verified.pop(jwt_token, None)
         raise ValueError('Expired Token')
 
     return payload
 
 
+def forget_subject(subject: str) -> None:
+    with _verified_lock:
+        for jwt_token in [jwt_token for jwt_token, (payload, _) in _verified.items() if payload['sub'] == subject]:
+            del _verified[jwt_token]
+
+
 def is_token_expired(payload: dict) -> bool:
     return datetime.utcnow() > datetime.fromisoformat(payload['exp'])
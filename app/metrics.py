@@ -0,0 +1,33 @@
+from collections import deque
+from threading import Lock
+
+
+class LatencyStats:
+    def __init__(self, window: int = 100):
+        self._window = window
+        self._calls = {}
+        self._lock = Lock()
+
+    def observe(self, name: str, seconds: float, ok: bool = True):
+        with self._lock:
+            call = self._calls.setdefault(name, {'count': 0, 'errors': 0, 'samples': deque(maxlen=self._window)})
+            call['count'] += 1
+            call['errors'] += not ok
+            call['samples'].append(seconds)
+
+    @property
+    def stats(self) -> dict:
+        with self._lock:
+            calls = {name: (call['count'], call['errors'], sorted(call['samples']))
+                     for name, call in self._calls.items()}
+
+        return {
+            name: {
+                'count': count,
+                'errors': errors,
+                'avg': sum(samples) / len(samples),
+                'p50': samples[len(samples) // 2],
+                'p95': samples[min(int(len(samples) * 0.95), len(samples) - 1)],
+                'max': samples[-1]
+            } for name, (count, errors, samples) in calls.items()
+        }
@@ -0,0 +1,51 @@
+from gunicorn.app.base import BaseApplication
+
+from app import app, config
+from app.db import db
+from app.db.utils import passwords
+from app.devices import start_devices, stop_devices
+
+
+def post_fork(server, worker):
+    # Connections opened by the master must not be shared with the worker
+    with app.app_context():
+        db.engine.dispose(close=False)
+
+    start_devices()
+
+
+def worker_exit(server, worker):
+    stop_devices()
+    passwords.shutdown()
+
+
+def get_options() -> dict:
+    options = {
+        'bind': f'{config.APP_HOST or "127.0.0.1"}:{config.APP_PORT}',
+        'worker_class': 'gthread',
+        # Poller snapshots, caches, callbacks and cloud logins are per worker: with more than one worker their
+        # state diverges and logins, callbacks and the poller budget are repeated in each of them
+        'workers': config.APP_WORKERS,
+        'threads': config.APP_THREADS,
+        'keepalive': config.APP_KEEPALIVE,
+        'graceful_timeout': config.APP_GRACEFUL_TIMEOUT,
+        'post_fork': post_fork,
+        'worker_exit': worker_exit
+    }
+    if config.APP_SSL_CRT and config.APP_SSL_KEY:
+        options.update(certfile=config.APP_SSL_CRT, keyfile=config.APP_SSL_KEY)
+
+    return options
+
+
+class Server(BaseApplication):
+    def __init__(self, options: dict = None):
+        self._options = get_options() if options is None else options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self._options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        return app
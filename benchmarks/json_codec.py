@@ -0,0 +1,56 @@
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import codec
+
+
+# One /v1.0/user/devices/query for four Xiaomi devices batched into a single prop/get call
+REQUEST = {'datasource': 1, 'params': [{'did': str(100000000 + did), 'siid': 2, 'piid': piid}
+                                       for did in range(4) for piid in range(1, 9)]}
+RESPONSE = json.dumps({'code': 0, 'message': 'ok', 'result': [
+    {**param, 'code': 0, 'value': True, 'updateTime': 1681000000, 'exe_time': 0} for param in REQUEST['params']
+]}).encode()
+JWT_PAYLOAD = json.dumps({'sub': 'user', 'typ': 'access', 'exp': '2023-04-20T12:00:00.000000'}).encode()
+STATUS = {'request_id': '5b3c9f1e-8a4d-4e3f-9a1b-2c7d8e9f0a1b', 'payload': {'devices': [
+    {'id': f'device.{index}', 'capabilities': [
+        {'type': 'devices.capabilities.mode', 'state': {'instance': 'program', 'value': 'auto'}}
+        for _ in range(8)
+    ], 'properties': [
+        {'type': 'devices.properties.float', 'state': {'instance': 'temperature', 'value': 22.5}}
+    ]} for index in range(4)
+]}}
+
+
+def legacy_query():
+    json.loads(JWT_PAYLOAD)
+    json.dumps(REQUEST)
+    json.loads(RESPONSE)
+    json.dumps(STATUS, indent=None, separators=(',', ':'), ensure_ascii=True, sort_keys=True)
+
+
+def current_query():
+    codec.loads(JWT_PAYLOAD)
+    codec.dumps(REQUEST)
+    codec.loads(RESPONSE)
+    codec.dumps_bytes(STATUS)
+
+
+def main(number=20000, repeat=5):
+    legacy, current = [], []
+    for _ in range(repeat):
+        legacy.append(timeit.timeit(legacy_query, number=number))
+        current.append(timeit.timeit(current_query, number=number))
+    legacy, current = min(legacy), min(current)
+
+    print(f'backend: {"orjson" if codec.orjson is not None else "json"}')
+    print(f'legacy:  {legacy / number * 1e6:8.1f} us/query')
+    print(f'current: {current / number * 1e6:8.1f} us/query')
+    print(f'saved:   {(legacy - current) / number * 1e6:8.1f} us/query')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+import base64
+import hashlib
+import json
+import os
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from arc4 import ARC4
+
+from app.clouds.mi_cloud import MiCloud, Rc4Keystream
+
+
+URL = 'https://ru.api.io.mi.com/app/miotspec/prop/get'
+SSECURITY = base64.b64encode(os.urandom(16)).decode()
+DATA = {'datasource': 1, 'params': [{'did': '123456789', 'siid': 2, 'piid': piid} for piid in range(1, 21)]}
+DATA_JSON = json.dumps(DATA)
+RESULT = {'code': 0, 'message': 'ok', 'result': [{**param, 'code': 0, 'value': True} for param in DATA['params']]}
+
+
+def legacy_signed_nonce(nonce):
+    hash_object = hashlib.sha256(base64.b64decode(SSECURITY) + base64.b64decode(nonce))
+
+    return base64.b64encode(hash_object.digest()).decode('utf-8')
+
+
+def legacy_encrypt_rc4(password, payload):
+    r = ARC4(base64.b64decode(password))
+    r.encrypt(bytes(1024))
+
+    return base64.b64encode(r.encrypt(payload.encode())).decode()
+
+
+def legacy_decrypt_rc4(password, payload):
+    r = ARC4(base64.b64decode(password))
+    r.encrypt(bytes(1024))
+
+    return r.encrypt(base64.b64decode(payload))
+
+
+def legacy_call(response_text):
+    headers = {
+        'Accept-Encoding': 'identity',
+        'User-Agent': 'agent',
+        'Content-Type': 'application/x-www-form-urlencoded',
+        'x-xiaomi-protocal-flag-cli': 'PROTOCAL-HTTP2',
+        'MIOT-ENCRYPT-ALGORITHM': 'ENCRYPT-RC4',
+    }
+    cookies = {
+        'userId': '1',
+        'yetAnotherServiceToken': 'token',
+        'serviceToken': 'token',
+        'locale': 'en_GB',
+        'timezone': 'GMT+02:00',
+        'is_daylight': '1',
+        'dst_offset': '3600000',
+        'channel': 'MI_APP_STORE'
+    }
+    millis = round(time.time() * 1000)
+    nonce = base64.b64encode(os.urandom(8) + (int(millis / 60000)).to_bytes(4, byteorder='big')).decode()
+    signed_nonce = legacy_signed_nonce(nonce)
+
+    params = {'data': DATA_JSON}
+    params['rc4_hash__'] = MiCloud._generate_enc_signature(URL, 'POST', signed_nonce, params)
+    for k, v in params.items():
+        params[k] = legacy_encrypt_rc4(signed_nonce, v)
+    params.update({
+        'signature': MiCloud._generate_enc_signature(URL, 'POST', signed_nonce, params),
+        'ssecurity': SSECURITY,
+        '_nonce': nonce,
+    })
+
+    return legacy_decrypt_rc4(legacy_signed_nonce(params['_nonce']), response_text)
+
+
+def current_call(cloud, response_text):
+    _, _, _, keystream = cloud._prepare_request(URL, {'data': DATA_JSON})
+
+    return keystream.apply(base64.b64decode(response_text))
+
+
+class OfflineMiCloud(MiCloud):
+    def _login(self):
+        self._userId = 1
+        self._serviceToken = 'token'
+        self._ssecurity = SSECURITY
+        self._ssecurity_bytes = base64.b64decode(SSECURITY)
+
+        return True
+
+
+def main(number=5000, repeat=10):
+    cloud = OfflineMiCloud('username', 'password', 'ru')
+
+    # Every call uses a fresh nonce, so the response is only decrypted, not parsed
+    key = hashlib.sha256(os.urandom(32)).digest()
+    response_text = base64.b64encode(Rc4Keystream(key).apply(json.dumps(RESULT).encode())).decode()
+
+    legacy, current = [], []
+    for _ in range(repeat):
+        legacy.append(timeit.timeit(lambda: legacy_call(response_text), number=number))
+        current.append(timeit.timeit(lambda: current_call(cloud, response_text), number=number))
+    legacy, current = min(legacy), min(current)
+
+    print(f'legacy:  {legacy / number * 1e6:8.1f} us/call')
+    print(f'current: {current / number * 1e6:8.1f} us/call')
+    print(f'speedup: {legacy / current:8.2f}x')
+
+
+if __name__ == '__main__':
+    main()
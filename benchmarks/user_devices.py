@@ -0,0 +1,61 @@
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('APP_SECRET', 'benchmark')
+
+from flask import request, Response
+
+from app import app
+from app.jwt import create_access_token, get_payload
+from app.devices import devices, create_devices
+from app.devices.engine import _build_info
+
+
+@app.route('/benchmark/legacy/user/devices', methods=['GET'])
+def get_user_devices_legacy():
+    access_token = request.headers['Authorization'].split()[-1]
+    request_id = request.headers['X-Request-Id']
+
+    try:
+        payload = get_payload(access_token)
+    except ValueError as exc:
+        return exc, 403
+
+    # Device info used to be a dict literal rebuilt on every access
+    devices_info = [_build_info(device.DESCRIPTION) if hasattr(device, 'DESCRIPTION') else device.yandex_info
+                    for device in devices.values()]
+
+    # Flask 2.2 encoded responses with the stdlib json module: compact, ASCII-only and with sorted keys
+    body = json.dumps({'request_id': request_id, 'payload': {'user_id': payload['sub'], 'devices': devices_info}},
+                      ensure_ascii=True, sort_keys=True, separators=(',', ':'))
+
+    return Response(body, mimetype='application/json')
+
+
+def main(number=2000, repeat=5):
+    create_devices()
+    client = app.test_client()
+    access_token, _ = create_access_token('benchmark')
+    headers = {'Authorization': f'Bearer {access_token}', 'X-Request-Id': 'request'}
+    etag = client.get('/v1.0/user/devices', headers=headers).headers['ETag']
+
+    cases = {
+        'legacy': lambda: client.get('/benchmark/legacy/user/devices', headers=headers),
+        'current': lambda: client.get('/v1.0/user/devices', headers=headers),
+        'not modified': lambda: client.get('/v1.0/user/devices', headers={**headers, 'If-None-Match': etag})
+    }
+
+    results = {name: [] for name in cases}
+    for _ in range(repeat):
+        for name, case in cases.items():
+            results[name].append(timeit.timeit(case, number=number))
+
+    for name, times in results.items():
+        print(f'{name + ":":14} {number / min(times):8.0f} req/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+import http.client
+import os
+import subprocess
+import sys
+import time
+from multiprocessing import Pool
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('APP_SECRET', 'benchmark')
+
+from app.jwt import create_access_token
+
+
+HOST = '127.0.0.1'
+PORT = 5055
+
+
+def _wait_ready(timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection(HOST, PORT, timeout=1)
+            connection.request('HEAD', '/v1.0')
+            connection.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.2)
+
+    raise RuntimeError('Server did not start')
+
+
+def _load(args) -> int:
+    headers, duration = args
+    connection = http.client.HTTPConnection(HOST, PORT)
+    deadline = time.monotonic() + duration
+    count = 0
+    while time.monotonic() < deadline:
+        connection.request('GET', '/v1.0/user/devices', headers=headers)
+        response = connection.getresponse()
+        response.read()
+        count += response.status == 200
+
+    return count
+
+
+def run(workers: int, clients: int, duration: float) -> float:
+    env = {**os.environ, 'APP_HOST': HOST, 'APP_PORT': str(PORT), 'APP_WORKERS': str(workers),
+           'APP_SSL_CRT': '', 'APP_SSL_KEY': '', 'POLLER_ENABLED': 'false'}
+    server = subprocess.Popen([sys.executable, 'runner.py'], cwd=ROOT, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        _wait_ready()
+        access_token, _ = create_access_token('benchmark')
+        headers = {'Authorization': f'Bearer {access_token}', 'X-Request-Id': 'request'}
+        with Pool(clients) as pool:
+            started = time.monotonic()
+            count = sum(pool.map(_load, [(headers, duration)] * clients))
+            elapsed = time.monotonic() - started
+    finally:
+        server.terminate()
+        server.wait()
+
+    return count / elapsed
+
+
+def main(worker_counts=(1, 2, 4), clients=8, duration=5):
+    print(f'cpus: {os.cpu_count()}, clients: {clients}')
+    baseline = None
+    for workers in worker_counts:
+        throughput = run(workers, clients, duration)
+        baseline = baseline or throughput
+        print(f'{workers} worker(s): {throughput:8.0f} req/s  x{throughput / baseline:.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,5 @@
-from app import app, config
+from app.server import Server
 
 
-ssl_context = (config.APP_SSL_CRT, config.APP_SSL_KEY)
-app.run(config.APP_HOST, config.APP_PORT, ssl_context=ssl_context)
+if __name__ == '__main__':
+    Server().run()